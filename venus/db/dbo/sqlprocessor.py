@@ -92,6 +92,51 @@ class SQLProcessor:
             subprocessor.truncate_last_comma()
         return self
 
+    def begin_batch(self):
+        """Start collecting SQL commands into a batch.
+
+        Processors that can send many commands at once may defer
+        processing the commands until flush_batch() is called. The
+        default implementation processes every command immediately.
+        Subprocessors are also notified.
+        """
+        for subprocessor in self.subprocessors:
+            subprocessor.begin_batch()
+        return self
+
+    def flush_batch(self):
+        """Process all SQL commands collected since begin_batch().
+
+        Subprocessors are also notified."""
+        for subprocessor in self.subprocessors:
+            subprocessor.flush_batch()
+        return self
+
+    def discard_batch(self):
+        """Throw away all SQL commands collected since begin_batch().
+
+        Subprocessors are also notified."""
+        for subprocessor in self.subprocessors:
+            subprocessor.discard_batch()
+        return self
+
+    def is_batching(self):
+        """Tell if processed commands are collected, instead of being processed immediately.
+
+        The default implementation never collects commands."""
+        return False
+
+    def _logline(self, buffer):
+        """Return the first line of a command, for logging."""
+        log = buffer.lstrip()
+        index = log.find(chr(13))
+        if index < 0:
+            index = log.find(chr(10))
+        if index > 0:
+            log = log[:index]
+        log.strip()
+        return log[:70]
+
     def doprocessbuffer(self):
         """Process one SQL command (process and clear internal buffer).
 
@@ -127,25 +172,25 @@ class SQLProcessor:
                         will logger.debug()
                 3. when ignore_exceptions is unset, unsuccessful
                     commands will logger.error()
+                4. commands collected into a batch (see is_batching)
+                    will call logger.info() with a "QUEUED " prefix,
+                    and they are logged again by flush_batch when
+                    they are actually executed.
 
         @param ignore_exceptions: whether to ignore exceptions or not.
             If you clear this flag then exceptions are caught and
             ignored. If you set this flag then have to handle
             exceptions. (The buffer will be cleared anyway.)
         """
-        log = self.buffer.lstrip()
-        index = log.find(chr(13))
-        if index < 0:
-            index = log.find(chr(10))
-        if index > 0:
-            log = log[:index]
-        log.strip()
-        log = log[:70]
+        log = self._logline(self.buffer)
         try:
             self.doprocessbuffer()
             self.buffer = ""
             if not (self.logger is None):
-                self.logger.info(log)
+                if self.is_batching():
+                    self.logger.info("QUEUED " + log)
+                else:
+                    self.logger.info(log)
         except:
             self.buffer = ""
             if not (self.logger is None):
@@ -193,11 +238,59 @@ class DirectSQLProcessor(SQLProcessor):
         """
         SQLProcessor.__init__(self, terminator, logger)
         self.pool = pool
+        self._batch = None
+
+    def begin_batch(self):
+        """Start collecting SQL commands into a batch.
+
+        Commands are executed together, on a single connection and in a
+        single transaction, when flush_batch() is called."""
+        self._batch = []
+        return SQLProcessor.begin_batch(self)
+
+    def flush_batch(self):
+        """Execute all SQL commands collected since begin_batch().
+
+        Commands are executed one by one, because not all drivers accept
+        multiple statements in one execute. The first failing command is
+        logged with logger.error(), and its exception is raised; the
+        transaction is then rolled back, and the batches of the
+        subprocessors are discarded."""
+        batch, self._batch = self._batch, None
+        try:
+            if batch:
+                with self.pool.opentrans() as conn:
+                    for cmd in batch:
+                        try:
+                            conn.execsql(cmd)
+                        except:
+                            if not (self.logger is None):
+                                self.logger.error(self._logline(cmd))
+                            raise
+                        if not (self.logger is None):
+                            self.logger.info(self._logline(cmd))
+        except:
+            SQLProcessor.discard_batch(self)
+            raise
+        return SQLProcessor.flush_batch(self)
+
+    def discard_batch(self):
+        """Throw away all SQL commands collected since begin_batch()."""
+        self._batch = None
+        return SQLProcessor.discard_batch(self)
+
+    def is_batching(self):
+        return self._batch is not None
 
     def doprocessbuffer(self):
-        """Send the buffer directly to the connection."""
-        with self.pool.opentrans() as conn:
-            conn.execsql(self.buffer)
+        """Send the buffer directly to the connection.
+
+        Inside a batch, the buffer is only collected."""
+        if self._batch is None:
+            with self.pool.opentrans() as conn:
+                conn.execsql(self.buffer)
+        else:
+            self._batch.append(self.buffer)
 
 
 class DummyLogger:
@@ -18,7 +18,14 @@ class dotted_name(str):
         of ast.YASDLItem subclasses.
     The ref attribute should point to the statically bound definition.
     When not bound, it should be None.
+    The direction attribute is only set for names listed in the fields
+        property of an index. It can be "asc" or "desc".
+
+    Dotted names are created in large numbers by the parser, so their
+    attributes are stored in slots instead of an instance dict.
     """
+    __slots__ = ('imp', 'absolute', 'min_classes', 'ref', 'refpath', 'lineno', 'colno', 'owner_schema',
+                 'direction', '_parts')
 
     def __init__(self, *args, **kwargs):
         str.__init__(*args, **kwargs)
@@ -30,11 +37,32 @@ class dotted_name(str):
         self.lineno = None
         self.colno = None
         self.owner_schema = None
+        self._parts = None
+
+    def __setstate__(self, state):
+        """Restore attributes of an unpickled dotted name.
+
+        Names pickled before slots were introduced have a plain dict state, others have
+        a (None, slots) tuple. Attributes missing from the state get their default values."""
+        if isinstance(state, tuple):
+            dict_state, slots_state = state
+            state = dict(dict_state or {})
+            state.update(slots_state or {})
+        self._parts = None
+        for name, value in state.items():
+            setattr(self, name, value)
 
     def items(self):
         """Return a list of items that make up the dotted name."""
         return self.split(".")
 
+    @property
+    def parts(self):
+        """Tuple of items that make up the dotted name. It is computed only once."""
+        if self._parts is None:
+            self._parts = tuple(self.split("."))
+        return self._parts
+
     def get_source_line(self):
         """Get source line code for the dotted name."""
         return self.owner_schema.get_source_line_of(self)
@@ -64,14 +92,23 @@ def is_minclass(obj, min_classes=None):
     """Return if an object is instance of any classes listed.
 
     :param obj: The object to be examined
-    :param min_classes: List of classes, or None.
+    :param min_classes: List (or any other iterable) of classes, or None. Passing a tuple is the fastest.
     :return: Passing an empty list will always return False. Passing None will always return True.
              E.g. None means "no restriction", and empty list means "do not accept anything".
     """
     if min_classes is None:
         return True
+    elif isinstance(min_classes, tuple):
+        return isinstance(obj, min_classes)
     else:
-        return True in [isinstance(obj, cls) for cls in min_classes]
+        return isinstance(obj, tuple(min_classes))
+
+
+# Static name cache shared by all leaf items. It must never be modified!
+_EMPTY_SNC = {}
+
+# YASDLItem attributes derived from the ownership tree, see YASDLItem.__getstate__
+_DERIVED_CACHES = ('_child_items', '_cached_path', '_owner_schema')
 
 
 class YASDLSymbol:
@@ -93,7 +130,16 @@ class YASDLItem:
     AST elements have a name, zero or more modifiers and zero or more
     owner items. This forms an ownership tree. Owned items can be
     YASDLItem instances, string literals (unicode), integers, floats etc.
+
+    AST elements are created in large numbers, and their attributes are
+    accessed very often by the compiler, so they are stored in slots.
+    Attributes set later by the parser and the compiler are also listed here.
     """
+    __slots__ = ('name', 'items', 'lineno', 'colno', '_hash', 'owner', '_child_items', '_cached_path',
+                 'modifiers', 'ancestors', 'descendants', 'specifications', 'implementations', '_snc',
+                 '_mbn', 'members', '_members_cached', 'unused_deletions', 'deletions', '_owner_schema',
+                 # Set by the compiler.
+                 'direct_implementor', 'final_implementor', 'realized', 'toplevel')
 
     def __init__(self, name, items=None):
         # Name of the item
@@ -107,12 +153,16 @@ class YASDLItem:
         self.colno = -1  # Will be set by yacc
         self._hash = None  # Will be set by parser
         self.owner = None  # Will be setup later with setup_owners
+        self._owner_schema = None  # Will be setup later with setup_owners
+        self._child_items = []  # YASDLItem instances in self.items, will be setup later with setup_owners
+        self._cached_path = None  # Will be set by getpath()
         # These below will be set later by the compiler
         self.modifiers = []
         self.ancestors = []
         self.descendants = set([])
         self.specifications = set([])
         self.implementations = set([])
+        self.realized = False
         # This will be set by _cache_static_names() later.
         self._snc = {}
         # These will be set by _cache_members() later.
@@ -121,6 +171,35 @@ class YASDLItem:
         self.unused_deletions = None
         self.deletions = None
 
+    def __getstate__(self):
+        """Return attributes to be pickled.
+
+        Caches derived from the ownership tree are not pickled, they are rebuilt
+        by setup_owners() when the parse result is loaded."""
+        state = {}
+        for cls in type(self).__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                if name not in _DERIVED_CACHES and hasattr(self, name):
+                    state[name] = getattr(self, name)
+        return state
+
+    def __setstate__(self, state):
+        """Restore attributes of an unpickled item.
+
+        Items pickled before slots were introduced (e.g. parse results stored by
+        earlier versions) have a plain dict state, others have a (None, slots) tuple.
+        Attributes missing from the state get their default values."""
+        if isinstance(state, tuple):
+            dict_state, slots_state = state
+            state = dict(dict_state or {})
+            state.update(slots_state or {})
+        self._owner_schema = None
+        self._child_items = []
+        self._cached_path = None
+        self.realized = False
+        for name, value in state.items():
+            setattr(self, name, value)
+
     def __iter__(self):
         """Iterate over subitems.
 
@@ -131,29 +210,44 @@ class YASDLItem:
 
         See also: iterate(), members, itercontained()
         """
-        for item in self.items:
-            if isinstance(item, YASDLItem):
-                for subitem in item:
-                    yield subitem
+        stack = [(None, iter(self._child_items))]
+        while stack:
+            parent, children = stack[-1]
+            for item in children:
+                if item._child_items:
+                    stack.append((item, iter(item._child_items)))
+                    break
                 yield item
+            else:
+                stack.pop()
+                if parent is not None:
+                    yield parent
 
     def iterate(self, min_classes=None):
         """Iterate over subitems.
 
         These subitems are all items in the ownership tree, given by the object. Traversal is depth first.
 
-        :param min_classes: A list of acceptable classes to return. When None, items of all classes are returned.
+        :param min_classes: A list or tuple of acceptable classes to return. When None, items of all classes are
+            returned.
 
         This method does NOT yield any inherited members. Unlike __iter__, this method can return itself!
 
         See also: itercontained(), has_member(), contains(), owns()
         See also: items, members
         """
-        for item in self:
-            if is_minclass(item, min_classes):
-                yield item
-        if is_minclass(self, min_classes):
+        if min_classes is None:
+            yield from self
             yield self
+        else:
+            # Convert to a tuple only once, not for each item.
+            if not isinstance(min_classes, tuple):
+                min_classes = tuple(min_classes)
+            for item in self:
+                if isinstance(item, min_classes):
+                    yield item
+            if isinstance(self, min_classes):
+                yield self
 
     def owns(self, item):
         """Item is owned the called object, directly or indirectly.
@@ -212,40 +306,39 @@ class YASDLItem:
         used_deletions = set([])
 
         self._mbn, self.members = {}, []
+        # Position of members in self.members, by name. Used to replace overridden members without a list scan.
+        positions = {}
 
         # Recursive step: inherit members from ancestors.
-        if hasattr(self, 'ancestors'):
-            for ancestor in self.ancestors:
-                # noinspection PyProtectedMember
-                ancestor._cache_members()
-                for inherited_member in ancestor.members:
-                    if isinstance(inherited_member, YASDLItem):
-                        if (inherited_member.name != 'implements') and \
-                                (inherited_member.name != 'ancestors'):
-                            if inherited_member.name in self.deletions:
-                                used_deletions.add(inherited_member.name)
-                            elif inherited_member.name in self._mbn:
-                                old = self._mbn[inherited_member.name]
-                                idx = self.members.index(old)
-                                self._mbn[inherited_member.name] = \
-                                    inherited_member
-                                self.members[idx] = inherited_member
-                            else:
-                                self._mbn[inherited_member.name] = \
-                                    inherited_member
-                                self.members.append(inherited_member)
+        for ancestor in self.ancestors:
+            # noinspection PyProtectedMember
+            ancestor._cache_members()
+            for inherited_member in ancestor.members:
+                if isinstance(inherited_member, YASDLItem):
+                    if (inherited_member.name != 'implements') and \
+                            (inherited_member.name != 'ancestors'):
+                        if inherited_member.name in self.deletions:
+                            used_deletions.add(inherited_member.name)
+                        elif inherited_member.name in self._mbn:
+                            self._mbn[inherited_member.name] = \
+                                inherited_member
+                            self.members[positions[inherited_member.name]] = inherited_member
+                        else:
+                            self._mbn[inherited_member.name] = \
+                                inherited_member
+                            positions[inherited_member.name] = len(self.members)
+                            self.members.append(inherited_member)
         # Normal step: our statically defined names.
         for item in self.items:
             item = getattr(item, 'final_implementor', item)
             if isinstance(item, YASDLItem) and \
                     not isinstance(item, YASDLDeletion):
                 if item.name in self._mbn:
-                    old = self._mbn[item.name]
-                    idx = self.members.index(old)  # TODO: might cache the index too, to speed up replacement!
                     self._mbn[item.name] = item
-                    self.members[idx] = item
+                    self.members[positions[item.name]] = item
                 else:
                     self._mbn[item.name] = item
+                    positions[item.name] = len(self.members)
                     self.members.append(item)
 
         self.unused_deletions = self.deletions - used_deletions
@@ -260,11 +353,8 @@ class YASDLItem:
         See also: itercontained(), has_member(), contains(), owns()
         See also: items, members
         """
-        if name in self._mbn:
-            member = self._mbn[name]
-            if is_minclass(member, min_classes):
-                return True
-        return False
+        member = self._mbn.get(name)
+        return member is not None and (min_classes is None or is_minclass(member, min_classes))
 
     def __contains__(self, name):
         """Very similar to has_member, but here you cannot specify min_classes."""
@@ -294,13 +384,22 @@ class YASDLItem:
         See also: itercontained(), has_member(), contains(), owns()
         See also: items, members
         """
-        for member in self.members:
-            if is_minclass(member, min_classes):
-                yield [member]
-            # if isinstance(member, YASDLFieldSet): ???
-            for submember_path in member.itercontained(min_classes):
-                submember_path.insert(0, member)
-                yield submember_path
+        if min_classes is not None:
+            min_classes = tuple(min_classes)
+        # Explicit stack of (path, members iterator) pairs, instead of recursive generators.
+        stack = [((), iter(self.members))]
+        while stack:
+            prefix, members = stack[-1]
+            for member in members:
+                path = prefix + (member,)
+                if min_classes is None or isinstance(member, min_classes):
+                    yield list(path)
+                # if isinstance(member, YASDLFieldSet): ???
+                if member.members:
+                    stack.append((path, iter(member.members)))
+                    break
+            else:
+                stack.pop()
 
     def contains(self, item):
         """Tells if the given item is contained within.
@@ -324,10 +423,11 @@ class YASDLItem:
         This will setup the 'owner' attribute in the whole ownership
         tree. (Only for YASDLItem instances)
         """
-        for item in self.items:
-            if isinstance(item, YASDLItem):
-                item.owner = self
-                item.setup_owners()
+        self._child_items = [item for item in self.items if isinstance(item, YASDLItem)]
+        for item in self._child_items:
+            item.owner = self
+            item._owner_schema = self._owner_schema
+            item.setup_owners()
 
     def getpath(self, show_src=False):
         """Return full name path of the item.
@@ -341,9 +441,15 @@ class YASDLItem:
         is unambiguous, and it identifies the item.
 
         The path is also used to create a hash of the item.
+
+        Paths are invariant after setup_owners() was called, so the path without the source file location
+        is cached.
         """
+        if not show_src and self._cached_path is not None:
+            return self._cached_path
+
         res = ""
-        if getattr(self, 'owner', None):
+        if self.owner:
             res += self.owner.getpath(show_src) + "." + self.name
         else:
             # res += self.name
@@ -351,8 +457,11 @@ class YASDLItem:
             assert isinstance(self, YASDLSchema)
             res += self.package_name
 
-        if show_src and hasattr(self, "src"):
-            res = "in " + getattr(self, "src") + ": " + res
+        if show_src:
+            if hasattr(self, "src"):
+                res = "in " + getattr(self, "src") + ": " + res
+        else:
+            self._cached_path = res
 
         return res
 
@@ -388,8 +497,12 @@ class YASDLItem:
         return res
 
     def _get_owner_schema(self):
-        """Get the schema that owns this item."""
-        return self._get_outermost_owner([YASDLSchema])
+        """Get the schema that owns this item.
+
+        The owner schema is cached by setup_owners(), so normally there is no need to walk the owner chain."""
+        if self._owner_schema is None:
+            return self._get_outermost_owner([YASDLSchema])
+        return self._owner_schema
 
     owner_schema = property(_get_owner_schema, None,
                             doc="Owner schema, if any.")
@@ -406,13 +519,19 @@ class YASDLItem:
         return isinstance(self.owner, YASDLSchema)
 
     def _cache_static_names(self):
-        """Create a cache of statically bound local names."""
-        self._snc.clear()
-        for item in self.items:
-            if isinstance(item, YASDLItem):
-                if hasattr(item, 'name'):
-                    self._snc[item.name] = item
-                item._cache_static_names()
+        """Create a cache of statically bound local names.
+
+        The whole ownership tree is processed in a single pass. Leaf items
+        (without YASDLItem children) share the same empty cache."""
+        unprocessed = [self]
+        while unprocessed:
+            obj = unprocessed.pop()
+            children = obj._child_items
+            if children:
+                obj._snc = {item.name: item for item in children if hasattr(item, 'name')}
+                unprocessed.extend(children)
+            else:
+                obj._snc = _EMPTY_SNC
 
     def bind_static(self, name, min_classes=None, recursive=True,
                     excludes=None):
@@ -552,11 +671,12 @@ class YASDLItem:
         #
 
         # Try to bind firstname dynamically, and go deeper if needed.
-        if self.has_member(firstname, min_classes):
+        # Same as self.has_member(firstname, min_classes), inlined because this is called very often.
+        head = self._mbn.get(firstname)
+        if head is not None and (min_classes is None or is_minclass(head, min_classes)):
             if len(name) == 1:
-                res = [self[firstname]]
+                res = [head]
             else:
-                head = self[firstname]
                 res = head.bindpath(name[1:], min_classes, False, excludes)
                 if res:
                     res.insert(0, head)
@@ -619,6 +739,7 @@ class YASDLItem:
 
 class YASDLUse(YASDLItem):
     """Use statement for a schema - not a definition."""
+    __slots__ = ('alias', 'schema', 'src')
 
     def __init__(self, name, alias=None):
         super(YASDLUse, self).__init__(name, [])
@@ -627,16 +748,17 @@ class YASDLUse(YASDLItem):
 
 class YASDLProperty(YASDLItem):
     """Property of an object - not a definition."""
-    pass
+    __slots__ = ()
 
 
 class YASDLDeletion(YASDLItem):
     """Deletion of a name - not a definition."""
-    pass
+    __slots__ = ()
 
 
 class YASDLDefinition(YASDLItem):
     """Definition object."""
+    __slots__ = ()
 
     def get_singleprop(self, name, defval=None):
         """Get first value of a property.
@@ -649,13 +771,12 @@ class YASDLDefinition(YASDLItem):
         If there is a property with the given name, but it does not have any value assigned, then KeyError is raised.
         If there is another definition (non-property), then TypeError is raised.
         """
-        if name in self._mbn:
-            obj = self._mbn[name]
-            if not isinstance(obj, YASDLProperty):
-                raise TypeError(_("%s is not a property") % name)
-            return obj.items[0]
-        else:
+        obj = self._mbn.get(name)
+        if obj is None:
             return defval
+        if not isinstance(obj, YASDLProperty):
+            raise TypeError(_("%s is not a property") % name)
+        return obj.items[0]
 
     def get_guid(self) -> str:
         """Get guid of the field."""
@@ -664,6 +785,7 @@ class YASDLDefinition(YASDLItem):
 
 class YASDLSchema(YASDLDefinition):
     """YASDL schema definition object."""
+    __slots__ = ('package_name', 'uses', '_source_lines', 'src', 'use_stack', 'search_path')
 
     def __init__(self, package_name, uses, items=None):
         if items is None:
@@ -691,23 +813,25 @@ class YASDLSchema(YASDLDefinition):
     def setup_owners(self):
         """Setup owner properties of all child objects."""
         self.owner = None
+        self._owner_schema = self
         YASDLDefinition.setup_owners(self)
         for use in self.uses:
             use.owner = self
+            use._owner_schema = self
             use.setup_owners()
 
 
 class YASDLField(YASDLDefinition):
     """YASDL field definition object."""
+    __slots__ = ()
 
     def get_referenced_fieldset(self) -> "YASDLFieldSet":
         """Get referenced fieldset (with "references" property).
 
         This method will return None for universal references."""
-        if "references" in self._mbn:
-            if self._mbn["references"].items:
-                ref_obj = self._mbn["references"].items[0]
-                return ref_obj.ref
+        prop_ref = self._mbn.get("references")
+        if prop_ref is not None and prop_ref.items:
+            return prop_ref.items[0].ref
 
     def get_type(self) -> str:
         """Get type of the field."""
@@ -750,7 +874,7 @@ class YASDLField(YASDLDefinition):
 
 class YASDLFieldSet(YASDLDefinition):
     """YASDL fieldset definition object."""
-    realized = False
+    __slots__ = ()
 
 
 YASDLFieldPath = List[Union[YASDLFieldSet, YASDLField]]
@@ -758,6 +882,7 @@ YASDLFieldPath = List[Union[YASDLFieldSet, YASDLField]]
 
 class YASDLIndex(YASDLDefinition):
     """YASDL index definition object."""
+    __slots__ = ()
 
     def get_fields(self):
         """Get the "fields" property of the index."""
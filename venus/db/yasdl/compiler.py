@@ -1,6 +1,6 @@
 """YASDL Compiler"""
-import copy
-import functools
+import collections
+import itertools
 
 import venus.i18n
 from venus.db.yasdl import ast
@@ -8,9 +8,35 @@ from venus.db.yasdl import lex
 
 _ = venus.i18n.get_my_translator(__file__)
 
+# Classification of reserved names. Names that are not listed here are not reserved.
+_RESERVED_GENERIC = 1  # Cannot be used for anything.
+_RESERVED_PROPERTY = 2  # Can only be used as a property name (see lex.RESERVED_PROPERTY_NAMES).
+_RESERVED_KIND = {}
+for _name in lex.reserved:
+    _RESERVED_KIND[_name] = _RESERVED_GENERIC
+for _name in lex.RESERVED_PROPERTY_NAMES:
+    _RESERVED_KIND[_name] = _RESERVED_PROPERTY
+del _name
+
+# Used for iterating over fields and fieldsets of the compilation.
+_FIELDS_AND_FIELDSETS = (ast.YASDLField, ast.YASDLFieldSet)
+
+# Valid arguments of some properties, checked in phase 7.
+_ONDELETE_ACTIONS = frozenset(["cascade", "setnull", "noaction", "fail"])
+_ONUPDATE_ACTIONS = frozenset(["cascade", "setnull", "noaction"])
+_REQLEVELS = frozenset(["required", "desired", "optional"])
+
+
+def _has_field(fieldset):
+    """Tell if a fieldset contains at least one field (directly or indirectly)."""
+    for _member_path in fieldset.itercontained((ast.YASDLField,)):
+        return True
+    return False
+
 
 class CompilerMessage:
     """A compiler message (error, warning, notice)."""
+    __slots__ = ('origin', 'message', 'code')
 
     def __init__(self, origin, message, code):
         self.origin = origin
@@ -23,14 +49,11 @@ class CompilerMessage:
     def gnu_format(self):
         """Format the compiler message according to GNU standards."""
         # http://www.gnu.org/prep/standards/standards.html#Errors
-        orig = self.origin
-        return '"%s":%s:%s:%s:%s' % (
-            orig.getsourcefile(),
-            orig.lineno,
-            self.get_message_kind() + (self.code or ""),
-            orig.getpath(False),
-            self.message
-        )
+        origin = self.origin
+        sourcefile = origin.getsourcefile()
+        kind = self.get_message_kind() + (self.code or "")
+        path = origin.getpath(False)
+        return f'"{sourcefile}":{origin.lineno}:{kind}:{path}:{self.message}'
 
     def python_format(self):
         """Format the compiler message as a Python error.
@@ -38,24 +61,21 @@ class CompilerMessage:
         This maybe useful in some IDEs so that they can generate navigational messages."""
         origin = self.origin
         line = origin.get_source_line()
-        if origin.colno >= 0:
-            caret = "\n" + " " * origin.colno + "^"
+        colno = origin.colno
+        if colno >= 0:
+            caret = "\n" + " " * colno + "^"
         else:
             caret = ""
-
-        return 'File "%s", line %s column %s in %s:\n%s%s\n%s %s: %s' % (
-            origin.getsourcefile(),
-            origin.lineno, origin.colno,
-            origin.getpath(False),
-            line, caret,
-            self.__class__.__name__,
-            self.get_message_kind() + (self.code or ""),
-            self.message
-        )
+        sourcefile = origin.getsourcefile()
+        path = origin.getpath(False)
+        kind = self.get_message_kind() + (self.code or "")
+        return f'File "{sourcefile}", line {origin.lineno} column {colno} in {path}:\n{line}{caret}\n' \
+               f'{self.__class__.__name__} {kind}: {self.message}'
 
 
 class CompilerError(CompilerMessage):
     """YASDL compiler error message."""
+    __slots__ = ()
 
     def get_message_kind(self):
         return "E"
@@ -63,6 +83,7 @@ class CompilerError(CompilerMessage):
 
 class CompilerWarning(CompilerMessage):
     """YASDL compiler warning message."""
+    __slots__ = ()
 
     def get_message_kind(self):
         return "W"
@@ -70,6 +91,7 @@ class CompilerWarning(CompilerMessage):
 
 class CompilerNotice(CompilerMessage):
     """YASDL compiler notice."""
+    __slots__ = ()
 
     def get_message_kind(self):
         return "N"
@@ -78,30 +100,51 @@ class CompilerNotice(CompilerMessage):
 class Compiler:
     """Semantic schema checker and compiler."""
 
-    def __init__(self, parsed, dbdriver=None):
+    def __init__(self, parsed, dbdriver=None, message_sink=None):
         """Initialize a compiler.
 
         :param parsed: A parsed syntax tree, as returned by yacc.parse().
         :param dbdriver: A database driver (subclass of
             venus.db.dbo.connection.Connection). When not given,
             driver specific checks won't be performed.
+        :param message_sink: A callable that receives CompilerMessage
+            instances as they are emitted. When given, messages are
+            passed to the sink instead of being collected in the
+            messages attribute. This keeps memory usage constant for
+            compilations with many messages.
         """
         self.parsed = parsed
         self.dbdriver = dbdriver
         self.schemas = parsed.schemas
         self.messages = []
+        self._message_sink = message_sink
+        if message_sink is None:
+            self._add_message = self.messages.append
+        else:
+            self._add_message = message_sink
         self.has_notice, self.has_warning, self.has_error = False, False, False
+        # Cache for iterate()
+        self._all_items = None
+        self._items_by_classes = {}
+        self._use_prefix_maps = {}
+        self._package_parts = {}
+        # Cache for _bindpath_schema(), see _bindpath()
+        self._bindpath_cache = {}
+        # Cache for _get_prop(), keyed by (obj, propname)
+        self._prop_cache = {}
+        # Type information from the database driver, keyed by type name. None for unsupported types.
+        self._typeinfo_cache = {}
 
     def append_error(self, origin, message, code=None):
-        self.messages.append(CompilerError(origin, message, code))
+        self._add_message(CompilerError(origin, message, code))
         self.has_error = True
 
     def append_warning(self, origin, message, code=None):
-        self.messages.append(CompilerWarning(origin, message, code))
+        self._add_message(CompilerWarning(origin, message, code))
         self.has_warning = True
 
     def append_notice(self, origin, message, code=None):
-        self.messages.append(CompilerNotice(origin, message, code))
+        self._add_message(CompilerNotice(origin, message, code))
         self.has_notice = True
 
     def iterate(self, min_classes=None):
@@ -110,22 +153,112 @@ class Compiler:
         :param min_classes: When given, it should be a list of YASDLItem subclasses. Only instances of the
             given classess will be yielded.
 
-        Very similar to YASDLItem.iterate, but works with the whole compilation (possibly over multiple top schemas)."""
-        for schema in self.schemas.values():
-            for item in schema.iterate(min_classes):
-                yield item
+        Very similar to YASDLItem.iterate, but works with the whole compilation (possibly over multiple top schemas).
+
+        The ownership tree does not change during compilation, so the items are collected only once, and
+        the filtered lists are cached for each min_classes."""
+        if self._all_items is None:
+            self._all_items = []
+            for schema in self.schemas.values():
+                self._all_items.extend(schema.iterate())
+        if min_classes is None:
+            return iter(self._all_items)
+        key = tuple(min_classes)
+        items = self._items_by_classes.get(key)
+        if items is None:
+            items = self._items_by_classes[key] = [item for item in self._all_items if isinstance(item, key)]
+        return iter(items)
+
+    def _run_steps(self, steps, strict=False):
+        """Run steps that process a single item, with a single walk over all items.
+
+        :param steps: A list of (method, min_classes, name) tuples. Each method is called with every item of the
+            compilation that is an instance of min_classes (a tuple of classes, or None for all items). When name
+            is not None, then the method is only called for items with that name.
+        :param strict: Stop on warnings too.
+        :return: True if the compilation can be continued, False otherwise.
+
+        The result is the same as running the steps one after another, and stopping after the first step that
+        had errors: messages are collected separately for every step, and they are emitted in step order.
+        But all steps are run on all items, so a step must not depend on the checks made by another step
+        of the same walk. When all steps give min_classes, then only the items of those classes are walked.
+
+        When there is only one step, or the messages are passed to a message sink, then the steps are really
+        run one after another, with a separate walk for each step. Then messages are not collected, they go
+        straight to the sink as they are emitted.
+        """
+        if len(steps) < 2 or self._message_sink is not None:
+            for step, min_classes, name in steps:
+                for item in self.iterate(min_classes):
+                    if name is None or item.name == name:
+                        step(item)
+                if self.has_error or (strict and self.has_warning):
+                    return False
+            return True
+
+        add_message = self._add_message
+        flags = self.has_notice, self.has_warning, self.has_error
+        step_messages = [[] for _step in steps]
+        # Only walk over items of the classes handled by the steps. The filtered lists are cached by iterate().
+        walk_classes = set([])
+        for _step, min_classes, _name in steps:
+            if min_classes is None:
+                walk_classes = None
+                break
+            walk_classes.update(min_classes)
+        if walk_classes is not None:
+            walk_classes = sorted(walk_classes, key=lambda cls: cls.__name__)
+        # Steps to be called for a given item class: a list of handlers for all names, and a dict of handler
+        # lists keyed by item name.
+        handlers_by_class = {}
+        try:
+            for item in self.iterate(walk_classes):
+                cls = item.__class__
+                handlers = handlers_by_class.get(cls)
+                if handlers is None:
+                    any_name, by_name = [], collections.defaultdict(list)
+                    for (step, min_classes, name), messages in zip(steps, step_messages):
+                        if min_classes is None or issubclass(cls, min_classes):
+                            if name is None:
+                                any_name.append((step, messages.append))
+                            else:
+                                by_name[name].append((step, messages.append))
+                    handlers = handlers_by_class[cls] = any_name, dict(by_name)
+                any_name, by_name = handlers
+                for step, append in any_name:
+                    self._add_message = append
+                    step(item)
+                if by_name:
+                    for step, append in by_name.get(item.name, ()):
+                        self._add_message = append
+                        step(item)
+        finally:
+            self._add_message = add_message
+            self.has_notice, self.has_warning, self.has_error = flags
+        for messages in step_messages:
+            for message in messages:
+                add_message(message)
+                if isinstance(message, CompilerError):
+                    self.has_error = True
+                elif isinstance(message, CompilerWarning):
+                    self.has_warning = True
+                else:
+                    self.has_notice = True
+            if self.has_error or (strict and self.has_warning):
+                return False
+        return True
 
     def _phase1_step1(self):
         """Nothing can use itself. Within one schema, you cannot have
         multiple use statements, referencing the same schema document."""
         # Check for multiple use statements
         for schema in self.schemas.values():
+            schema_src = schema.src
+            use_srcs = {}
             for use in schema.uses:
-                if use.src == schema.src:
+                if use.src == schema_src:
                     self.append_error(use,
                                       _("Nothing can 'use' or 'require' itself."), "01011")
-            use_srcs = {}
-            for use in schema.uses:
                 if use.src in use_srcs:
                     msg = _("Multiple use statements for the same source is not allowed.")
                     self.append_error(use, msg, "0102")
@@ -141,29 +274,26 @@ class Compiler:
         Cannot use special property names for anything else.
 
         """
-
-        def _chk(attrname, label):
-            if isinstance(obj, ast.YASDLItem) and hasattr(obj, attrname):
-                attrvalue = getattr(obj, attrname)
-                if "." in attrvalue:
-                    self.append_error(obj, _("Cannot have '.' in %s") % label,
-                                      "01031")
-                for word in list(lex.reserved.keys()) + lex.RESERVED_PROPERTY_NAMES:
-                    if word == attrvalue:
-                        if not isinstance(obj, ast.YASDLProperty) or \
-                                not (word in lex.RESERVED_PROPERTY_NAMES):
-                            self.append_error(obj,
-                                              _("'%s' is a reserved property name.") % \
-                                              word, "01032")
-                if attrvalue == "id":
-                    self.append_error(obj,
-                                      _("'id' is an invalid name in %s") % label,
-                                      "01033")
-
         if isinstance(obj, ast.YASDLItem):
-            _chk("name", "name")
-        if isinstance(obj, ast.YASDLUse):
-            _chk("alias", "alias")
+            self._check_name(obj, obj.name, "name")
+            if isinstance(obj, ast.YASDLUse) and obj.alias is not None:
+                self._check_name(obj, obj.alias, "alias")
+
+    def _check_name(self, obj, value, label):
+        """Check a name or an alias of an object for _phase1_step3."""
+        if "." in value:
+            self.append_error(obj, _("Cannot have '.' in %s") % label,
+                              "01031")
+        kind = _RESERVED_KIND.get(value, 0)
+        if kind == _RESERVED_GENERIC or \
+                (kind == _RESERVED_PROPERTY and not isinstance(obj, ast.YASDLProperty)):
+            self.append_error(obj,
+                              _("'%s' is a reserved property name.") % \
+                              value, "01032")
+        if value == "id":
+            self.append_error(obj,
+                              _("'id' is an invalid name in %s") % label,
+                              "01033")
 
     def _phase1_step4(self, obj):
         """Check for name duplicates.
@@ -176,7 +306,7 @@ class Compiler:
         of the schema being defined.
         """
         if isinstance(obj, ast.YASDLDefinition):
-            names = []
+            names = set([])
             if isinstance(obj, ast.YASDLSchema):
                 for use in obj.uses:
                     if use.alias:
@@ -186,21 +316,21 @@ class Compiler:
                     if name in names:
                         self.append_error(use, _("Duplicated name %s." % repr(name)), "01041")
                     else:
-                        names.append(name)
+                        names.add(name)
 
             for item in obj.items:
                 name = item.name
                 if name in names:
                     self.append_error(item, _("Duplicated name %s." % repr(name)), "01041")
                 else:
-                    names.append(name)
+                    names.add(name)
 
     def _phase1_step5(self, obj):
         """Check special property names.
 
         Any object with reserved name can only be a property."""
         if isinstance(obj, ast.YASDLItem):
-            if obj.name in lex.RESERVED_PROPERTY_NAMES:
+            if _RESERVED_KIND.get(obj.name) == _RESERVED_PROPERTY:
                 if not isinstance(obj, ast.YASDLProperty):
                     self.append_error(obj, _("The name '%s' should belong to a property.") % obj.name, "01051")
 
@@ -223,8 +353,7 @@ class Compiler:
                 for name in obj.items:
                     if isinstance(name, ast.YASDLAll):
                         # Convert "all" to list of ancestors.
-                        prop_ancestors = obj.owner.bind_static(
-                            "ancestors", recursive=False)
+                        prop_ancestors = self._get_prop(obj.owner, "ancestors")
                         if prop_ancestors:
                             _newnames = list(map(
                                 ast.dotted_name, prop_ancestors.items))
@@ -278,6 +407,41 @@ class Compiler:
     #    else:
     #        return None
 
+    def _get_prefixed_uses(self, schema, name):
+        """Get use statements of a schema that can be used to bind a name.
+
+        :param schema: The schema that contains the use statements.
+        :param name: An ast.dotted_name instance.
+        :return: A list of (use, prefix) tuples, in the order of the use statements. The prefix is the alias
+            of the use statement, or the name of the used schema when there is no alias. It is always
+            a leading part of the name.
+        """
+        prefix_map = self._use_prefix_maps.get(schema)
+        if prefix_map is None:
+            prefix_map = {}
+            for idx, use in enumerate(schema.uses):
+                if use.alias is None:
+                    prefix = use.name
+                else:
+                    prefix = use.alias
+                prefix_map.setdefault(tuple(prefix.split(".")), []).append((idx, use, prefix))
+            self._use_prefix_maps[schema] = prefix_map
+        if not prefix_map:
+            return []
+        parts = name.parts
+        found = []
+        for idx in range(1, len(parts) + 1):
+            found.extend(prefix_map.get(parts[:idx], ()))
+        found.sort(key=lambda item: item[0])
+        return [(use, prefix) for _, use, prefix in found]
+
+    def _has_package_prefix(self, schema, name):
+        """Tell if the package name of a schema is a leading part of an ast.dotted_name."""
+        prefix_parts = self._package_parts.get(schema)
+        if prefix_parts is None:
+            prefix_parts = self._package_parts[schema] = tuple(schema.package_name.split("."))
+        return name.parts[:len(prefix_parts)] == prefix_parts
+
     def _bindpath_static(self, obj, name, recursive=True, excludes=None):
         """Static binding.
 
@@ -303,25 +467,20 @@ class Compiler:
                 return path
 
             # Then, try to find it in used schemas.
-            for use in schema.uses:
-                if use.alias is None:
-                    prefix = use.name
-                else:
-                    prefix = use.alias
-                if name.startswith(prefix):
-                    subname = name[len(prefix) + 1:]
-                    # print "search",subname,use.schema.getdebugpath()
-                    path = use.schema.bindpath_static(
-                        subname, name.min_classes,
-                        recursive=recursive, excludes=excludes)
-                    if path:
-                        path.insert(0, use.schema)
-                        return path
+            for use, prefix in self._get_prefixed_uses(schema, name):
+                subname = name[len(prefix) + 1:]
+                # print "search",subname,use.schema.getdebugpath()
+                path = use.schema.bindpath_static(
+                    subname, name.min_classes,
+                    recursive=recursive, excludes=excludes)
+                if path:
+                    path.insert(0, use.schema)
+                    return path
 
             # Finally, we check if the name is prefixed with the
             # package name of the owner schema.
             if not name.absolute:
-                if name.startswith(schema.package_name):
+                if self._has_package_prefix(schema, name):
                     subname = name[len(schema.package_name) + 1:]
                     # print "search",schema.getdebugpath()
                     path = schema.bindpath_static(
@@ -400,43 +559,75 @@ class Compiler:
                     self.append_error(obj,
                                       _("Definition %s not found (#2).") % name, "01088")
 
-    def _prop_closure(self, obj, propname):
-        allprops = []
-        # First the direct parents.
-        prop = obj.bind_static(propname, min_classes={ast.YASDLProperty},
-                               recursive=False)
-        if prop:
-            for item in prop.items:
-                allprops.append(item.ref)
-        # Then the indirect ones.
-        while True:
-            items_before = len(allprops)
-            for obj in allprops:
-                prop = obj.bind_static(propname,
-                                       min_classes={ast.YASDLProperty}, recursive=False)
-                if prop:
-                    for item in prop.items:
-                        if not item.ref in allprops:
-                            allprops.append(item.ref)
-            items_after = len(allprops)
-            if items_before == items_after:
-                break
-        return allprops
+    def _get_prop(self, obj, propname):
+        """Get a property of a definition, without searching in its owners.
+
+        Only use this for property names that cannot be used for anything else (e.g. "ancestors",
+        "implements" and "references"), because the result is cached and min_classes is not checked."""
+        key = (obj, propname)
+        try:
+            return self._prop_cache[key]
+        except KeyError:
+            prop = self._prop_cache[key] = obj.bind_static(propname, recursive=False)
+            return prop
+
+    def _find_cycle(self, objs, propname):
+        """Find a circular reference.
+
+        :param objs: The objects to start from.
+        :param propname: Name of the property that references other definitions (e.g. "implements").
+        :return: None if there are no circular references. Otherwise a tuple of (obj, path) where obj is
+            an object on the circular reference, and path is the list of objects that lead from obj
+            back to obj. (The last element of path is obj itself.)
+
+        This is a single depth first search over all objects. Every object and every reference is
+        visited at most once, and the search stops at the first circular reference."""
+        # Objects on the current search path are mapped to True, finished objects to False.
+        on_path = {}
+        for root in objs:
+            if root in on_path:
+                continue
+            on_path[root] = True
+            stack = [(root, self._iter_refs(root, propname))]
+            while stack:
+                item, refs = stack[-1]
+                for ref in refs:
+                    state = on_path.get(ref)
+                    if state is None:
+                        on_path[ref] = True
+                        stack.append((ref, self._iter_refs(ref, propname)))
+                        break
+                    elif state:
+                        path = [entry[0] for entry in stack]
+                        path = path[path.index(ref) + 1:]
+                        path.append(ref)
+                        return ref, path
+                else:
+                    on_path[item] = False
+                    stack.pop()
+        return None
 
-    def _check_circular(self, obj, propname, errorcode):
-        if isinstance(obj, ast.YASDLItem):
-            closure = self._prop_closure(obj, propname)
-            if obj in closure:
-                msg = _("Circular reference for '%s' was detected ") % \
-                      propname
-                self.append_error(obj, msg + " (#0)", errorcode)
-                for idx, item in enumerate(closure):
-                    self.append_error(item, msg + " (#%d)" % (idx + 1),
-                                      errorcode)
-                return False
-            for item in obj.items:
-                if not self._check_circular(item, propname, errorcode):
-                    return False
+    def _iter_refs(self, obj, propname):
+        """Iterate over definitions referenced by the given property of obj."""
+        prop = self._get_prop(obj, propname)
+        if prop:
+            for name in prop.items:
+                yield name.ref
+
+    def _check_circular(self, objs, propname, errorcode):
+        """Check for circular references, and report the first one as an error.
+
+        :return: True if there are no circular references."""
+        cycle = self._find_cycle(objs, propname)
+        if cycle:
+            obj, path = cycle
+            msg = _("Circular reference for '%s' was detected ") % \
+                  propname
+            self.append_error(obj, msg + " (#0)", errorcode)
+            for idx, item in enumerate(path):
+                self.append_error(item, msg + " (#%d)" % (idx + 1),
+                                  errorcode)
+            return False
         return True
 
     def _phase1_step9(self):
@@ -446,24 +637,23 @@ class Compiler:
         implementors.
         Note: the checker only displays the first error.
         """
-        for obj in self.iterate([ast.YASDLField, ast.YASDLFieldSet]):
-            if not self._check_circular(obj, 'implements', "01091"):
-                break
+        self._check_circular(self.iterate(_FIELDS_AND_FIELDSETS), 'implements', "01091")
 
     def _phase2_step1(self):
         """No multiple implementations."""
-        # Setup a cache for all implementors
-        for obj in self.iterate([ast.YASDLField, ast.YASDLFieldSet]):
-            obj._all_implementors = set([])
-        # Create backreferences for all implementors
-        for obj in self.iterate([ast.YASDLField, ast.YASDLFieldSet]):
-            implements = obj.bind_static('implements', recursive=False)
+        defs = list(self.iterate(_FIELDS_AND_FIELDSETS))
+        # Build a reverse index for all implementors, in a single pass.
+        implementors = {}
+        for obj in defs:
+            implements = self._get_prop(obj, 'implements')
             if implements:
                 for item in implements.items:
-                    item.ref._all_implementors.add(obj)
+                    all_imps = implementors.setdefault(item.ref, [])
+                    if obj not in all_imps:
+                        all_imps.append(obj)
         # Now, check for multiple implementors
-        for obj in self.iterate([ast.YASDLField, ast.YASDLFieldSet]):
-            all_imps = obj._all_implementors
+        for obj in defs:
+            all_imps = implementors.get(obj, ())
             if len(all_imps) > 1:
                 self.append_error(obj,
                                   _("Multiple definitions want to implement this."), "02011")
@@ -471,12 +661,9 @@ class Compiler:
                     self.append_error(item, _("Multiple implementation."), "02011")
 
             elif len(all_imps) == 1:
-                obj.direct_implementor = all_imps[0].owner
+                obj.direct_implementor = all_imps[0]
             else:
                 obj.direct_implementor = None
-        # Clean up the mess
-        for obj in self.iterate([ast.YASDLField, ast.YASDLFieldSet]):
-            del obj._all_implementors
 
     def _has_imp_ancestor(self, obj):
         """Tells if obj has an imp_name listed in its ancestors.
@@ -485,7 +672,7 @@ class Compiler:
 
         """
         # No need for min_classes because 'ancestors' can only be a property.
-        prop_ancestors = obj.bind_static("ancestors", recursive=False)
+        prop_ancestors = self._get_prop(obj, "ancestors")
         if prop_ancestors:
             for name in prop_ancestors.items:
                 if name.imp:
@@ -494,7 +681,7 @@ class Compiler:
 
     def _phase2_step2(self):
         """Cannot implement a definition that has imp_name ancestor(s)."""
-        for obj in self.iterate([ast.YASDLField, ast.YASDLFieldSet]):
+        for obj in self.iterate(_FIELDS_AND_FIELDSETS):
             if obj.direct_implementor is not None:
                 if self._has_imp_ancestor(obj):
                     self.append_error(obj,
@@ -510,23 +697,32 @@ class Compiler:
         This method has a side effect: it sets the ``final_implementor`` attribute of the object.
         This method is called by the compiler, you do not need to call it directly. After successful compilation,
         use the ``final_implementor`` instead.
+
+        The implementation chain is followed iteratively, until a definition with a known final implementation
+        (or without a direct implementor) is found. Then all definitions on the chain are updated at once.
         """
-        if obj.direct_implementor:
-            obj.final_implementor = self.set_final_implementation_of(
-                obj.direct_implementor)
-        else:
-            obj.final_implementor = obj  # Implements itself
-        return obj.final_implementor
+        chain = []
+        final = getattr(obj, 'final_implementor', None)
+        while final is None:
+            chain.append(obj)
+            if obj.direct_implementor:
+                obj = obj.direct_implementor
+                final = getattr(obj, 'final_implementor', None)
+            else:
+                final = obj  # Implements itself
+        for item in chain:
+            item.final_implementor = final
+        return final
 
     def _phase2_step3(self):
         # Finding final implementations
-        for obj in self.iterate([ast.YASDLField, ast.YASDLFieldSet]):
-            if not hasattr(obj, 'final_implementor'):
+        for obj in self.iterate(_FIELDS_AND_FIELDSETS):
+            if getattr(obj, 'final_implementor', None) is None:
                 self.set_final_implementation_of(obj)
 
     def _phase2_step4(self):
         # Check final an abstract modifiers
-        for obj in self.iterate([ast.YASDLField, ast.YASDLFieldSet]):
+        for obj in self.iterate(_FIELDS_AND_FIELDSETS):
             if (obj.final_implementor == obj) and \
                     ('abstract' in obj.modifiers) and \
                     ('required' in obj.modifiers):
@@ -543,50 +739,35 @@ class Compiler:
     def _phase2_step5(self):
         """Implementations and specifications cannot contain each other."""
         # First we divide definitions by their final implementors.
-        trees = {}
-        for obj in self.iterate([ast.YASDLField, ast.YASDLFieldSet]):
-            fi = obj.final_implementor
-            if fi in trees:
-                trees[fi].add(obj)
-            else:
-                trees[fi] = {obj}
+        trees = collections.defaultdict(set)
+        for obj in self.iterate(_FIELDS_AND_FIELDSETS):
+            trees[obj.final_implementor].add(obj)
 
         for fi, items in trees.items():
-            # This may look slow. However, implementation trees usually
-            # contain a few items only, so it is not that slow.
-            for i1 in items:
-                for i2 in items:
-                    if id(i1) > id(i2):
-                        if i1.owns(i2):
-                            msg = _("Definitions in the same " +
-                                    "implementation tree cannot contain each other.")
-                            code = "02051"
-                            self.append_error(i1, msg, code)
-                            self.append_error(i2, msg, code)
+            # Walk up the owner chain of every item, and check if it is
+            # owned by another item of the same implementation tree.
+            for i2 in items:
+                i1 = i2.owner
+                while i1 is not None:
+                    if i1 in items:
+                        msg = _("Definitions in the same " +
+                                "implementation tree cannot contain each other.")
+                        code = "02051"
+                        self.append_error(i1, msg, code)
+                        self.append_error(i2, msg, code)
+                    i1 = i1.owner
 
         # In the documentation, this is step 6. But since we already have
         # the trees, it is much faster to do it here.
+        # Implementations of an item are the items along its direct_implementor
+        # chain, and the item is a specification of all of them.
         for fi, items in trees.items():
             for item in items:
-                while True:
-                    added = 0
-
-                    for spec in items:
-                        if (spec.direct_implementor is item) or \
-                                (spec.direct_implementor in item.specifications):
-                            if not spec in item.specifications:
-                                item.specifications.add(spec)
-                                added += 1
-
-                    for imp in items:
-                        if (item.direct_implementor is imp) or \
-                                (item.direct_implementor in imp.specifications):
-                            if not imp in item.implementations:
-                                item.implementations.add(imp)
-                                added += 1
-
-                    if not added:
-                        break
+                imp = item.direct_implementor
+                while imp is not None:
+                    item.implementations.add(imp)
+                    imp.specifications.add(item)
+                    imp = imp.direct_implementor
 
     def _phase3_step1(self, obj):
         if isinstance(obj, ast.YASDLProperty) and obj.name == "ancestors":
@@ -670,16 +851,14 @@ class Compiler:
         references by ancestors statements or the colon operator.
         Note: the checker only displays the first error.
         """
-        for obj in self.iterate([ast.YASDLField, ast.YASDLFieldSet]):
-            if not self._check_circular(obj, 'ancestors', "03021"):
-                break
+        self._check_circular(self.iterate(_FIELDS_AND_FIELDSETS), 'ancestors', "03021")
 
     def _phase3_step3(self):
         """Def with imp_name ancestors cannot implement other definitions."""
-        for obj in self.iterate([ast.YASDLField, ast.YASDLFieldSet]):
+        for obj in self.iterate(_FIELDS_AND_FIELDSETS):
             # No need to check for min_classes because "implements"
             # can only be a property.
-            implements = obj.bind_static("implements", recursive=False)
+            implements = self._get_prop(obj, "implements")
             if implements and implements.items:
                 if self._has_imp_ancestor(obj):
                     self.append_error(obj,
@@ -690,56 +869,60 @@ class Compiler:
         """Calculate all ancestors and descendants."""
         # First we determine inheritance graphs. This is very tricky, indeed!
         # Calculate all ancestors in the right order.
-        defiter = functools.partial(self.iterate, [ast.YASDLField, ast.YASDLFieldSet])
-        for obj in defiter():
+        for obj in self.iterate(_FIELDS_AND_FIELDSETS):
             # obj.ancestors = []
             # No need to check for min_classes because "ancestors"
             # can only be a property.
-            prop_ancestors = obj.bind_static("ancestors", recursive=False)
+            prop_ancestors = self._get_prop(obj, "ancestors")
             if prop_ancestors:
+                # Descendants are the reversed ancestor edges, so they are collected in the same pass.
+                ancestors = obj.ancestors
                 for item in prop_ancestors.items:
                     if item.imp:
-                        obj.ancestors.append(item.ref.final_implementor)
-                        item.ref.final_implementor.descendants.add(obj)
+                        ancestor = item.ref.final_implementor
                     else:
-                        obj.ancestors.append(item.ref)
-                        item.ref.descendants.add(obj)
+                        ancestor = item.ref
+                    ancestors.append(ancestor)
+                    ancestor.descendants.add(obj)
 
     def _phase3_step5(self):
         """Within one inheritance graph, no def can contain another def."""
         # We need to classify definitions into graphs.
         # This is very tricky indeed!
-        alldefs = set([obj for obj in self.iterate([ast.YASDLField, ast.YASDLFieldSet])])
+        # Graphs are the connected components of the ancestor/descendant
+        # edges. Every definition is visited exactly once. Graphs with a
+        # single definition are not collected, they cannot have conflicts.
+        visited = set([])
         graphs = []
-        while alldefs:
-            item = alldefs.pop()  # Get one element
-            unprocessed, processed = {item}, set([])
-            # Now, process.
+        for obj in self.iterate(_FIELDS_AND_FIELDSETS):
+            if obj in visited:
+                continue
+            visited.add(obj)
+            graph, unprocessed = [obj], [obj]
             while unprocessed:
                 item = unprocessed.pop()
-                for ancestor in item.ancestors:
-                    if ancestor in alldefs:
-                        alldefs.remove(ancestor)
-                        unprocessed.add(ancestor)
-                for descendant in item.descendants:
-                    if descendant in alldefs:
-                        alldefs.remove(descendant)
-                        unprocessed.add(descendant)
-                processed.add(item)
-            graphs.append(processed)
+                for other in itertools.chain(item.ancestors, item.descendants):
+                    if other not in visited:
+                        visited.add(other)
+                        graph.append(other)
+                        unprocessed.append(other)
+            if len(graph) > 1:
+                graphs.append(graph)
 
         for graph in graphs:
-            # This may look slow. However, implementation trees usually
-            # contain a few items only, so it is not that slow.
-            for i1 in graph:
-                for i2 in graph:
-                    if id(i1) > id(i2):
-                        if i1.owns(i2):
-                            msg = _("Definitions in the same inheritance " +
-                                    "graph cannot contain each other.")
-                            code = "03051"
-                            self.append_error(i1, msg, code)
-                            self.append_error(i2, msg, code)
+            # Walk up the owner chain of every item, and check if it is
+            # owned by another item of the same inheritance graph.
+            members = set(graph)
+            for i2 in graph:
+                i1 = i2.owner
+                while i1 is not None:
+                    if i1 in members:
+                        msg = _("Definitions in the same inheritance " +
+                                "graph cannot contain each other.")
+                        code = "03051"
+                        self.append_error(i1, msg, code)
+                        self.append_error(i2, msg, code)
+                    i1 = i1.owner
 
     def _phase3_step6(self):
         """Cache all members of all definitions."""
@@ -790,37 +973,58 @@ class Compiler:
             if path:
                 return path
 
-            # Then, try to find in in used schemas.
-            for use in schema.uses:
-                if use.alias is None:
-                    prefix = use.name
-                else:
-                    prefix = use.alias
-                if name.startswith(prefix):
-                    subname = name[len(prefix) + 1:]
-                    path = use.schema.bindpath(subname, name.min_classes,
-                                               recursive, excludes)
-                    if path:
-                        path.insert(0, schema)
-                        return path
-
-            # Finally, we check if the name is prefixed with the
-            # package name of the owner schema.
-            if not name.absolute:
-                if name.startswith(schema.package_name):
-                    subname = name[len(schema.package_name) + 1:]
-                    path = schema.bindpath(subname, name.min_classes,
-                                           recursive, excludes)
-                    if path:
-                        self.append_warning(obj,
-                                            _("Absolute name used to access an object " +
-                                              "inside the same schema (instead of " +
-                                              "'schema.<name>')."), "99012")
-                        path.insert(0, schema)
-                        return path
+            # Then try the used schemas and the package name. These do not
+            # depend on obj, only on its schema, so they can be cached.
+            if excludes is None:
+                key = (schema, name.parts, name.absolute,
+                       None if name.min_classes is None else frozenset(name.min_classes), recursive)
+                cached = self._bindpath_cache.get(key)
+                if cached is None:
+                    cached = self._bindpath_cache[key] = self._bindpath_schema(schema, name, recursive, excludes)
+                path, prefixed = cached
+            else:
+                path, prefixed = self._bindpath_schema(schema, name, recursive, excludes)
+            if path:
+                if prefixed:
+                    self.append_warning(obj,
+                                        _("Absolute name used to access an object " +
+                                          "inside the same schema (instead of " +
+                                          "'schema.<name>')."), "99012")
+                # Return a copy, because the cached path must not be changed by the caller.
+                return list(path)
 
         return None
 
+    def _bindpath_schema(self, schema, name, recursive, excludes):
+        """Dynamic binding in used schemas, or with the package name of the schema.
+
+        This is the part of _bindpath() that does not depend on the object where the name is used.
+
+        :return: A tuple of (path, prefixed). The prefixed flag is set when the name was bound with the
+            package name of the schema (instead of "schema.<name>").
+        """
+        # Try to find in in used schemas.
+        for use, prefix in self._get_prefixed_uses(schema, name):
+            subname = name[len(prefix) + 1:]
+            path = use.schema.bindpath(subname, name.min_classes,
+                                       recursive, excludes)
+            if path:
+                path.insert(0, schema)
+                return path, False
+
+        # Finally, we check if the name is prefixed with the
+        # package name of the owner schema.
+        if not name.absolute:
+            if self._has_package_prefix(schema, name):
+                subname = name[len(schema.package_name) + 1:]
+                path = schema.bindpath(subname, name.min_classes,
+                                       recursive, excludes)
+                if path:
+                    path.insert(0, schema)
+                    return path, True
+
+        return None, False
+
     def _phase4_step1(self, obj):
         if isinstance(obj, ast.YASDLProperty) and (obj.name == "references"):
             if len(obj.items) > 1:
@@ -879,16 +1083,21 @@ class Compiler:
                                   _("Index definition must have at least one field."),
                                   "04042")
                 return
+            refs = []
             for item in fields.items:
-                if not isinstance(item, ast.dotted_name) or (
-                        not isinstance(item.ref, ast.YASDLField) and
-                        not isinstance(item.ref, ast.YASDLFieldSet)):
+                if not isinstance(item, ast.dotted_name) or \
+                        not isinstance(item.ref, _FIELDS_AND_FIELDSETS):
                     self.append_error(fields, _("Arguments of the " +
                                                 "'fields' property must be fields or fieldsets."), "04043")
                     return
-            for item in fields.items:
-                if not obj.owner.contains(item.ref):
-                    if isinstance(item.ref, ast.YASDLField):
+                refs.append(item.ref)
+            # Walk the contained items of the owner only once, instead of
+            # calling obj.owner.contains() for every indexed field.
+            contained = set([member_path[-1] for member_path
+                             in obj.owner.itercontained(_FIELDS_AND_FIELDSETS)])
+            for ref in refs:
+                if ref not in contained:
+                    if isinstance(ref, ast.YASDLField):
                         msg = _("Trying to index on a field that is " +
                                 "not contained the fieldset.")
                     else:
@@ -897,17 +1106,17 @@ class Compiler:
                     msg += " (%s)"
                     code = "04044"
                     self.append_error(fields, msg % _("referenced from"), code)
-                    self.append_error(item.ref, msg % _("references to"), code)
+                    self.append_error(ref, msg % _("references to"), code)
                     return
             fset = set([])
-            for item in fields.items:
-                if item.ref in fset:
+            for ref in refs:
+                if ref in fset:
                     msg = _("Duplicate field in index definition. (%s)")
                     code = "04045"
                     self.append_error(obj, msg % _("referenced from"), code)
-                    self.append_error(item.ref, msg % _("references to"), code)
+                    self.append_error(ref, msg % _("references to"), code)
                 else:
-                    fset.add(item.ref)
+                    fset.add(ref)
 
     def _phase4_step5(self, obj):
         if isinstance(obj, ast.YASDLConstraint):
@@ -944,18 +1153,16 @@ class Compiler:
             main_schema = self.parsed.schemas[main_src]
             realized_schemas.add(main_schema)
         # Now the recursive steps: if a required schema is requiring
-        # another schema...
-        while True:
-            req_before = len(realized_schemas)
-            for schema in copy.copy(realized_schemas):
-                for use in schema.uses:
-                    if 'required' in use.modifiers:
-                        realized_schemas.add(use.schema)
-            req_after = len(realized_schemas)
-            if req_before == req_after:
-                break
+        # another schema... Every realized schema is processed only once.
+        unprocessed = list(realized_schemas)
+        while unprocessed:
+            schema = unprocessed.pop()
+            for use in schema.uses:
+                if 'required' in use.modifiers and use.schema not in realized_schemas:
+                    realized_schemas.add(use.schema)
+                    unprocessed.append(use.schema)
 
-        for schema in self.iterate([ast.YASDLSchema]):
+        for schema in self.iterate((ast.YASDLSchema,)):
             schema.realized = schema in realized_schemas
 
         #
@@ -967,9 +1174,14 @@ class Compiler:
         #
         # Fieldsets
         #
-        realized_fieldsets = set([])
+        # The realized flag of the items is used as the membership test
+        # while the requirements are collected. Reset it first.
+        for item in self.iterate(_FIELDS_AND_FIELDSETS):
+            item.realized = False
+        for item in self.iterate((ast.YASDLFieldSet,)):
+            item.toplevel = False
+        unprocessed = []
         toplevel_fieldsets = set([])
-        realized_fields = set([])
 
         # First step: if an outermost fieldset definition has the required
         # modifier and is placed in a realized schema, then its
@@ -979,9 +1191,12 @@ class Compiler:
             for item in schema.items:
                 if isinstance(item, ast.YASDLFieldSet):
                     if 'required' in item.modifiers and item.is_outermost():
-                        if item.final_implementor.is_outermost():
-                            realized_fieldsets.add(item.final_implementor)
-                            toplevel_fieldsets.add(item.final_implementor)
+                        fi = item.final_implementor
+                        if fi.is_outermost():
+                            toplevel_fieldsets.add(fi)
+                            if not fi.realized:
+                                fi.realized = True
+                                unprocessed.append(fi)
                         else:
                             msg = _("Final implementation of required " +
                                     "outermost fieldset sould be outermost, " +
@@ -989,64 +1204,52 @@ class Compiler:
                             code = "05011"
                             self.append_error(item, msg % _("specification"),
                                               code)
-                            self.append_error(item.final_implementor,
-                                              msg % _("implementation"), code)
+                            self.append_error(fi, msg % _("implementation"), code)
 
         #
-        # Recursive sub-steps
+        # Recursive sub-steps. Every realized fieldset is processed only once.
         #
-        while True:
-            req_before = len(realized_fieldsets) + len(realized_fieldsets)
-
-            # If a fieldset is realized, then all of its members
-            # are realized. And they are not top level...
-            for item in copy.copy(realized_fieldsets):
-                for member_path in item.itercontained([ast.YASDLField]):
-                    realized_fields.add(member_path[-1])
-                for member_path in item.itercontained([ast.YASDLFieldSet]):
-                    realized_fieldsets.add(member_path[-1])
-
-            # If a realized field references another F fieldset with the
-            # references property (or the arrow operator), then the
-            # final implementation of the F fieldset is must be realized.
-            # And it must be outermost, but we have already checked that
-            # in phase 4 step 3. Universal references are ignored - they
-            # do not generate requirements, but they can only reference to rows
-            # stored in realized fieldsets.
-            #
-            for item in copy.copy(realized_fieldsets):
-                for member_path in item.itercontained([ast.YASDLField]):
-                    member = member_path[-1]
-                    prop_ref = member.bind_static('references', None, False)
-                    if prop_ref:
-                        ref_obj = prop_ref.items[0]
-                        referenced = ref_obj.ref.final_implementor
-                        realized_fieldsets.add(referenced)
-                        toplevel_fieldsets.add(referenced)
-
-            req_after = len(realized_fieldsets) + len(realized_fieldsets)
-
-            if req_before == req_after:
-                break
+        while unprocessed:
+            item = unprocessed.pop()
+            # A single walk over all contained fields and fieldsets. Since it
+            # is recursive, contained fieldsets need not be processed again.
+            for member_path in item.itercontained(_FIELDS_AND_FIELDSETS):
+                member = member_path[-1]
+
+                # If a fieldset is realized, then all of its members
+                # are realized. And they are not top level...
+                member.realized = True
+                if isinstance(member, ast.YASDLFieldSet):
+                    continue
+
+                # If a realized field references another F fieldset with the
+                # references property (or the arrow operator), then the
+                # final implementation of the F fieldset is must be realized.
+                # And it must be outermost, but we have already checked that
+                # in phase 4 step 3. Universal references are ignored - they
+                # do not generate requirements, but they can only reference to rows
+                # stored in realized fieldsets.
+                #
+                prop_ref = self._get_prop(member, 'references')
+                if prop_ref and prop_ref.items:
+                    referenced = prop_ref.items[0].ref.final_implementor
+                    toplevel_fieldsets.add(referenced)
+                    if not referenced.realized:
+                        referenced.realized = True
+                        unprocessed.append(referenced)
 
         # Set some important attributes.
         self.parsed.toplevel_fieldsets = toplevel_fieldsets
-        for item in self.parsed.iterate([ast.YASDLFieldSet]):
-            item.realized = item in realized_fieldsets
-            item.toplevel = item in toplevel_fieldsets
-        for item in self.parsed.iterate([ast.YASDLField]):
-            item.realized = item in realized_fields
-        while True:
-            added = 0
-            for item in self.parsed.iterate(
-                    [ast.YASDLField, ast.YASDLFieldSet]):
-                if item.realized:
-                    for spec in item.specifications:
-                        if not spec.realized:
-                            spec.realized = True
-                            added += 1
-            if not added:
-                break
+        for item in toplevel_fieldsets:
+            item.toplevel = True
+        # Specifications of realized definitions are also realized.
+        unprocessed = [item for item in self.iterate(_FIELDS_AND_FIELDSETS) if item.realized]
+        while unprocessed:
+            item = unprocessed.pop()
+            for spec in item.specifications:
+                if not spec.realized:
+                    spec.realized = True
+                    unprocessed.append(spec)
 
     def _phase5_step4(self, obj):
         if isinstance(obj, ast.YASDLField) or \
@@ -1063,7 +1266,7 @@ class Compiler:
 
         For every realized fieldset, required members of its
         specifications must be realized."""
-        for obj in self.iterate([ast.YASDLFieldSet]):
+        for obj in self.iterate((ast.YASDLFieldSet,)):
             if obj.realized:
                 for spec in obj.iterspecifications():
                     # Iterate over members of the specification, e.g.
@@ -1088,24 +1291,14 @@ class Compiler:
     def _phase7_step1(self, obj):
         if isinstance(obj, ast.YASDLFieldSet) and \
                 obj.realized and obj.toplevel:
-            has_field = False
-            for member_path in obj.itercontained():
-                if isinstance(member_path[-1], ast.YASDLField):
-                    has_field = True
-                    break
-            if not has_field:
+            if not _has_field(obj):
                 self.append_error(obj, _("Realized top level fieldsets " +
                                          "must contain at least one field."), "07011")
 
     def _phase7_step2(self, obj):
         if isinstance(obj, ast.YASDLFieldSet) and obj.realized and \
                 not obj.toplevel:
-            has_field = False
-            for member_path in obj.itercontained():
-                if isinstance(member_path[-1], ast.YASDLField):
-                    has_field = True
-                    break
-            if not has_field:
+            if not _has_field(obj):
                 self.append_warning(obj, _("Realized non-toplevel " +
                                            "fieldsets should contain at least one field."), "07021")
 
@@ -1223,15 +1416,19 @@ class Compiler:
                                   _("'guid' property must have " +
                                     "a single non-empty string argument."), "07111")
             else:
-                if guid in self.parsed.all_guids:
+                # Index by the guid value, so that duplicates are found with a single lookup.
+                # The same guid property can be inherited by many definitions, that is not a duplicate.
+                value = guid.items[0]
+                other = self.parsed.all_guids.get(value)
+                if other is not None and other["guid"] is not guid:
                     self.append_error(obj,
                                       _("Values of the guid property must be unique in the compilation set."),
                                       "07112")
-                    self.append_error(self.parsed.all_guids[guid],
+                    self.append_error(other,
                                       _("Values of the guid property must be unique in the compilation set."),
                                       "07112")
-                else:
-                    self.parsed.all_guids[guid.items[0]] = obj
+                elif other is None:
+                    self.parsed.all_guids[value] = obj
 
     def _phase7_step12(self, obj):
         if not isinstance(obj, ast.YASDLField):
@@ -1248,7 +1445,7 @@ class Compiler:
                 ondelete = obj["ondelete"]
                 if len(ondelete.items) != 1 or \
                         not isinstance(ondelete.items[0], str) or \
-                        (ondelete.items[0] not in ["cascade", "setnull", "noaction", "fail"]):
+                        (ondelete.items[0] not in _ONDELETE_ACTIONS):
                     self.append_error(ondelete,
                                       _("Argument of 'ondelete' property must be in " +
                                         "['cascade','setnull','noaction', 'fail']"), "07123")
@@ -1256,16 +1453,12 @@ class Compiler:
                 onupdate = obj["onupdate"]
                 if len(onupdate.items) != 1 or \
                         not isinstance(onupdate.items[0], str) or \
-                        (onupdate.items[0] not in ["cascade", "setnull", "noaction"]):
+                        (onupdate.items[0] not in _ONUPDATE_ACTIONS):
                     self.append_error(onupdate,
                                       _("Argument of 'onupdate' property must be in " +
                                         "['cascade','setnull','noaction']"), "07123")
 
     def _phase7_step13(self, obj):
-        msg = _("Index is part of a realized final implementation, " +
-                "so it should be created, but its field is not realized.")
-        msg += " (%s)"
-        code = "07131"
         if isinstance(obj, ast.YASDLFieldSet) and obj.realized \
                 and obj.final_implementor is obj:
             for idx in obj.members:
@@ -1274,17 +1467,21 @@ class Compiler:
                     for fieldref in fields.items:
                         field = fieldref.ref
                         if not field.realized:
+                            msg = _("Index is part of a realized final implementation, " +
+                                    "so it should be created, but its field is not realized.")
+                            msg += " (%s)"
+                            code = "07131"
                             self.append_error(obj, msg % _("table"), code)
                             self.append_error(fields, msg % _("index"), code)
                             self.append_error(field, msg % _("field"), code)
 
     def _phase7_step14(self, obj):
-        msg = _("The 'language' property is not defined for this schema, " +
-                "assuming 'en'.")
-        code = "07141"
         if isinstance(obj, ast.YASDLSchema):
             langprop = obj.bind_static("language", [ast.YASDLProperty], False)
             if langprop is None:
+                msg = _("The 'language' property is not defined for this schema, " +
+                        "assuming 'en'.")
+                code = "07141"
                 self.append_warning(obj, msg, code)
 
     def _phase7_step15(self, obj):
@@ -1319,7 +1516,7 @@ class Compiler:
             reqlevel = obj
             if len(reqlevel.items) != 1 or \
                     not isinstance(reqlevel.items[0], str) or \
-                    (reqlevel.items[0] not in ["required", "desired", "optional"]):
+                    (reqlevel.items[0] not in _REQLEVELS):
                 self.append_notice(reqlevel,
                                    _("Argument of 'reqlevel' property shoud be in " +
                                      "['required', 'desired', 'optional']"), "07171")
@@ -1333,21 +1530,18 @@ class Compiler:
             prop_notnull = obj.get_singleprop("notnull")
             prop_ondelete = obj.get_singleprop("ondelete")
             prop_onupdate = obj.get_singleprop("onupdate")
+            # The values are checked, but the errors are reported on the property definitions.
             if prop_notnull:
                 if prop_ondelete == 'setnull':
-                    self.append_error(prop_notnull,
-                                      _("Must not have 'notnull true' and 'ondelete setnull' combination."),
-                                      "07181")
-                    self.append_error(prop_ondelete,
-                                      _("Must not have 'notnull true' and 'ondelete setnull' combination."),
-                                      "07181")
+                    msg = _("Must not have 'notnull true' and 'ondelete setnull' combination.")
+                    code = "07181"
+                    self.append_error(obj["notnull"], msg, code)
+                    self.append_error(obj["ondelete"], msg, code)
                 if prop_onupdate == 'setnull':
-                    self.append_error(prop_notnull,
-                                      _("Must not have 'notnull true' and 'onupdate setnull' combination."),
-                                      "07182")
-                    self.append_error(prop_onupdate,
-                                      _("Must not have 'notnull true' and 'onupdate setnull' combination."),
-                                      "07182")
+                    msg = _("Must not have 'notnull true' and 'onupdate setnull' combination.")
+                    code = "07182"
+                    self.append_error(obj["notnull"], msg, code)
+                    self.append_error(obj["onupdate"], msg, code)
 
     def _phase7_step19(self, obj):
         if isinstance(obj, ast.YASDLSchema):
@@ -1367,9 +1561,15 @@ class Compiler:
         """Database driver specific checks."""
         if self.dbdriver and isinstance(obj, ast.YASDLField) and obj.realized:
             typ = obj.get_type()
-            try:
-                typeinfo = self.dbdriver.get_typeinfo(typ)
-            except KeyError:
+            if typ in self._typeinfo_cache:
+                typeinfo = self._typeinfo_cache[typ]
+            else:
+                try:
+                    typeinfo = self.dbdriver.get_typeinfo(typ)
+                except KeyError:
+                    typeinfo = None
+                self._typeinfo_cache[typ] = typeinfo
+            if typeinfo is None:
                 self.append_error(obj["type"],
                                   _("Type '%s' is not supported by this driver.") % typ,
                                   "08011")
@@ -1399,8 +1599,11 @@ class Compiler:
 
         # self._phase1_step2() # 2017-12-13 - we allow circular references, from now on.
 
-        for step in range(6):
-            phase_method = getattr(self, '_phase1_step' + str(step + 3))
+        phase1_steps = [(self._phase1_step3, None, None), (self._phase1_step4, None, None),
+                        (self._phase1_step5, None, None), (self._phase1_step6, None, None)]
+        if not self._run_steps(phase1_steps, strict):
+            return False
+        for phase_method in (self._phase1_step7, self._phase1_step8):
             for item in self.iterate():
                 phase_method(item)
             if self.has_error or (strict and self.has_warning):
@@ -1410,8 +1613,8 @@ class Compiler:
             return False
 
         # Phase 2 - building implementation trees
-        for step in range(5):
-            phase_method = getattr(self, '_phase2_step' + str(step + 1))
+        for phase_method in (self._phase2_step1, self._phase2_step2, self._phase2_step3, self._phase2_step4,
+                             self._phase2_step5):
             phase_method()
             if self.has_error or (strict and self.has_warning):
                 return False
@@ -1421,16 +1624,19 @@ class Compiler:
             self._phase3_step1(item)
         if self.has_error or (strict and self.has_warning):
             return False
-        for step in range(6):
-            phase_method = getattr(self, '_phase3_step' + str(step + 2))
+        for phase_method in (self._phase3_step2, self._phase3_step3, self._phase3_step4, self._phase3_step5,
+                             self._phase3_step6, self._phase3_step7):
             phase_method()
             if self.has_error or (strict and self.has_warning):
                 return False
 
         # Phase 4 - binding all other names dynamically.
-        for step in range(5):
-            phase_method = getattr(self, '_phase4_step' + str(step + 1))
-            for item in self.iterate():
+        # Steps 1-3 only deal with properties, step 4 with indexes and step 5 with constraints.
+        prop = (ast.YASDLProperty,)
+        phase4_steps = [(self._phase4_step1, prop), (self._phase4_step2, prop), (self._phase4_step3, prop),
+                        (self._phase4_step4, (ast.YASDLIndex,)), (self._phase4_step5, (ast.YASDLConstraint,))]
+        for phase_method, min_classes in phase4_steps:
+            for item in self.iterate(min_classes):
                 phase_method(item)
             if self.has_error or (strict and self.has_warning):
                 return False
@@ -1450,22 +1656,43 @@ class Compiler:
             return False
 
         # Phase 7 - other checks
+        # Steps 1-16 only depend on the previous phases, so they are run with a single walk. Steps 17-19 use
+        # properties that are validated by steps 8, 11 and 12, so they are run with a second walk.
+        # Every step is only called with items of the classes it handles. Steps 15-17 check a single property,
+        # they are only called with properties of the given name.
         self.parsed.all_guids = {}
-        step = 0
-        while True:
-            phase_method = getattr(self, '_phase7_step' + str(step + 1), None)
-            if phase_method is None:
-                break
-            for obj in self.iterate():
-                phase_method(obj)
-            if self.has_error or (strict and self.has_warning):
-                return False
-            step += 1
+        fieldset, field = (ast.YASDLFieldSet,), (ast.YASDLField,)
+        phase7_steps = [
+            (self._phase7_step1, fieldset, None),
+            (self._phase7_step2, fieldset, None),
+            (self._phase7_step3, field, None),
+            (self._phase7_step4, fieldset, None),
+            (self._phase7_step5, field, None),
+            (self._phase7_step6, field, None),
+            (self._phase7_step7, field, None),
+            (self._phase7_step8, None, None),
+            (self._phase7_step9, None, None),
+            (self._phase7_step10, None, None),
+            (self._phase7_step11, None, None),
+            (self._phase7_step12, None, None),
+            (self._phase7_step13, fieldset, None),
+            (self._phase7_step14, (ast.YASDLSchema,), None),
+            (self._phase7_step15, prop, "language"),
+            (self._phase7_step16, prop, "cluster"),
+        ]
+        if not self._run_steps(phase7_steps, strict):
+            return False
 
-        # Phase 8 - database type dependent checks.
-        for item in self.iterate():
-            self._phase8_step1(item)
-        if self.has_error or (strict and self.has_warning):
+        # Phase 8 - database type dependent checks. It only depends on phase 7 steps 5-7, so it is run
+        # together with the remaining steps of phase 7. Without a driver, there is nothing to check.
+        phase7_and_phase8_steps = [
+            (self._phase7_step17, prop, "reqlevel"),
+            (self._phase7_step18, field, None),
+            (self._phase7_step19, (ast.YASDLSchema, ast.YASDLFieldSet), None),
+        ]
+        if self.dbdriver:
+            phase7_and_phase8_steps.append((self._phase8_step1, field, None))
+        if not self._run_steps(phase7_and_phase8_steps, strict):
             return False
 
         return True
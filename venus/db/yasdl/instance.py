@@ -81,6 +81,7 @@ class YASDLUpgradeContext(NamedTuple):
     field_diffs: List[YASDLFieldDiffResult]
     sqlprocessor: SQLProcessor
     options: Dict
+    changed_field_diffs: List[YASDLFieldDiffResult]  # field_diffs that have has_change set
 
 
 class YASDLInstance:
@@ -196,12 +197,16 @@ class YASDLInstance:
         # First we setup unique identifiers for all definition objects.
         # These are used for hashing them.
         self._pnames = {}
+        self._field_pnames = {}
         self._pknames = {}
         self._fknames = {}
         self._idxnames = {}
         self._constraintnames = {}
         self._schema_by_pname = {}
         self._table_by_full_pname = {}
+        self._fk_referers = {}
+        self._realized_fields = {}
+        self._cache_toplevel_realized_fieldsets()
         with self.cpool.open() as conn:
             for schema in self.parsed.iterate([ast.YASDLSchema]):
                 # Schema name
@@ -223,24 +228,55 @@ class YASDLInstance:
                 self._cache_fields_pnames(conn, schema, table)
                 self._cache_incides_pnames(conn, table)
 
+    def _cache_toplevel_realized_fieldsets(self):
+        """Cache realized toplevel fieldsets, grouped by their schemas.
+
+        See toplevel_realized_fieldsets() and schemas_with_toplevel_realized_fieldsets(). Both are also indexed
+        by their guids, for diff_schemas() and diff_tables()."""
+        tables_by_schema = {}
+        for table in self.parsed.toplevel_fieldsets:
+            if table.realized:
+                tables_by_schema.setdefault(table.owner, []).append(table)
+        self._toplevel_realized = []
+        self._schemas_with_toplevel_realized = []
+        self._schemas_by_guid = {}
+        self._tables_by_guid = {}
+        for schema in self.parsed.iterate([ast.YASDLSchema]):
+            tables = tables_by_schema.get(schema)
+            if tables:
+                self._schemas_with_toplevel_realized.append(schema)
+                self._schemas_by_guid[schema.get_guid()] = schema
+                for table in tables:
+                    self._toplevel_realized.append((schema, table))
+                    self._tables_by_guid[table.get_guid()] = table
+
     def _cache_fields_pnames(self, conn, schema, table):
-        """Cache physical names of all realized fields of a top-level table."""
+        """Cache physical names of all realized fields of a top-level table.
+
+        Referencing fields are also indexed by the referenced table, see get_fk_referers()."""
+        is_venus_schema = schema.getpath().startswith("venus.")
+        realized_fields = self._realized_fields[table] = []
+        field_pnames = self._field_pnames[table] = {}
+        fknames = self._fknames[table] = {}
         for fieldpath in table.itercontained([ast.YASDLField]):
             field = fieldpath[-1]
             if field.realized:
-                key = tuple([table] + fieldpath)
+                key = tuple(fieldpath)
                 # Normal field: store its physical name.
-                self._pnames[key] = conn.makefieldname(fieldpath)
+                field_pname = field_pnames[key] = conn.makefieldname(fieldpath)
+                realized_fields.append((fieldpath, field_pname))
                 reftbl = field.get_referenced_fieldset()
                 if reftbl:
-                    self._fknames[key] = conn.makefkname(
+                    fknames[key] = conn.makefkname(
                         schema, table, fieldpath)
+                    if not is_venus_schema:
+                        self._fk_referers.setdefault(reftbl, []).append((schema, table, fieldpath))
 
     def _cache_incides_pnames(self, conn, table):
         for member in table.members:
             if isinstance(member, ast.YASDLIndex):
                 self._idxnames[(table, member)] = conn.makeindexname(table, member)
-            if isinstance(member, ast.YASDLConstraint):
+            elif isinstance(member, ast.YASDLConstraint):
                 self._constraintnames[(table, member)] = conn.makeconstraintname(table, member)
 
     def get_schema_pname(self, schema: ast.YASDLSchema) -> str:
@@ -317,10 +353,24 @@ class YASDLInstance:
 
         If the field is not realized, then NotRealizedError is raised."""
         try:
-            return self._pnames[tuple([table] + fieldpath)]
+            return self._field_pnames[table][tuple(fieldpath)]
         except KeyError:
             raise NotRealizedError(table.getpath() + " " + fieldpath[-1].getpath())
 
+    def get_realized_fields(self, table):
+        """Get realized fields of a realized top-level table.
+
+        :param table: realized top-level YASDLFieldSet definition
+        :return: A list of (fieldpath, field_pname) tuples, in the order of itercontained(). The fieldpath is
+            relative to the table, and field_pname is the physical name of the field. The list is cached, it
+            must not be modified.
+
+        If the table is not realized, then NotRealizedError is raised."""
+        try:
+            return self._realized_fields[table]
+        except KeyError:
+            raise NotRealizedError()
+
     def get_index_pname(self, table, index):
         """Get physical name for an index.
 
@@ -365,21 +415,19 @@ class YASDLInstance:
         if not fieldpath[-1].realized:
             raise NotRealizedError()
         try:
-            return self._fknames[tuple([table] + fieldpath)]
+            return self._fknames[table][tuple(fieldpath)]
         except KeyError:
             return None
 
     def toplevel_realized_fieldsets(self) -> (ast.YASDLSchema, ast.YASDLFieldSet):
-        """Generator that iterates over realized toplevel fieldsets."""
-        for schema in self.parsed.iterate([ast.YASDLSchema]):
-            for table in self.parsed.toplevel_fieldsets:
-                if table.realized and table.owner is schema:
-                    yield schema, table
+        """Iterate over (schema, table) pairs of realized toplevel fieldsets.
+
+        The pairs are collected only once, when the instance is created."""
+        return iter(self._toplevel_realized)
 
     def schemas_with_toplevel_realized_fieldsets(self):
-        """Yield a list of schemas that have at least one toplevel fieldset."""
-        for schema in set([scm for scm, tbl in self.toplevel_realized_fieldsets()]):
-            yield schema
+        """Iterate over schemas that have at least one toplevel fieldset."""
+        return iter(self._schemas_with_toplevel_realized)
 
     def get_fk_referers(self, ref_to_table):
         """Iterate over realized fields that reference the given table.
@@ -390,14 +438,28 @@ class YASDLInstance:
             The last element in the fieldpath is the field that references ref_to_table with foreign key.
             Only realized fields of realized tables are yielded.
         """
-        for schema, table in self.toplevel_realized_fieldsets():
-            if schema.getpath().startswith("venus."):
-                continue
-            for fieldno, fieldpath in enumerate(table.itercontained([ast.YASDLField])):
-                field = fieldpath[-1]
-                if field.realized:
-                    if field.get_referenced_fieldset() is ref_to_table:
-                        yield (schema, table, fieldpath)
+        for schema, table, fieldpath in self._fk_referers.get(ref_to_table, ()):
+            yield (schema, table, list(fieldpath))
+
+    @classmethod
+    def _batched(cls, sqlprocessor, options, step):
+        """Call a create, drop or upgrade step, and process its SQL commands in a single batch.
+
+        :param step: A callable without arguments that executes the step.
+
+        See SQLProcessor.begin_batch(). Commands are not batched when exceptions are ignored, because a failed
+        command would also discard the other commands of the batch. When the step raises an exception, the
+        collected commands are discarded, and the exception is re-raised."""
+        if options["ignore_exceptions"]:
+            step()
+        else:
+            sqlprocessor.begin_batch()
+            try:
+                step()
+            except:
+                sqlprocessor.discard_batch()
+                raise
+            sqlprocessor.flush_batch()
 
     def create_before_all(self, sqlprocessor, options):
         """Before anything is created.
@@ -407,14 +469,14 @@ class YASDLInstance:
 
     def create_schemas(self, sqlprocessor, options):
         """Create schemas, but only for the ones that have realized toplevel fieldsets."""
-        for scm in self.schemas_with_toplevel_realized_fieldsets():
-            with self.cpool.open() as conn:
+        with self.cpool.open() as conn:
+            for scm in self.schemas_with_toplevel_realized_fieldsets():
                 conn.yasdl_create_schema(self, scm, sqlprocessor, options)
 
     def create_tables(self, sqlprocessor, options):
         """Create tables for realized toplevel fieldset definitions."""
-        for scm, tbl in self.toplevel_realized_fieldsets():
-            with self.cpool.open() as conn:
+        with self.cpool.open() as conn:
+            for scm, tbl in self.toplevel_realized_fieldsets():
                 conn.yasdl_create_table(
                     self, scm, tbl, sqlprocessor, options)
 
@@ -428,8 +490,8 @@ class YASDLInstance:
         """Create constraints for all tables.
 
         This method is called after initial rows have been added."""
-        for scm, tbl in self.toplevel_realized_fieldsets():
-            with self.cpool.open() as conn:
+        with self.cpool.open() as conn:
+            for scm, tbl in self.toplevel_realized_fieldsets():
                 conn.yasdl_create_table_constraints(
                     self, scm, tbl, sqlprocessor, options)
                 conn.yasdl_create_all_field_constraints(self, tbl, sqlprocessor, options)
@@ -438,14 +500,14 @@ class YASDLInstance:
         """Create indexes for all tables.
 
         This method is called after initial rows have been added."""
-        for scm, tbl in self.toplevel_realized_fieldsets():
-            with self.cpool.open() as conn:
+        with self.cpool.open() as conn:
+            for scm, tbl in self.toplevel_realized_fieldsets():
                 conn.yasdl_create_table_indexes(self, scm, tbl, sqlprocessor, options)
 
     def create_triggers(self, sqlprocessor, options):
         """Create triggers on all tables and their fields."""
-        for scm, tbl in self.toplevel_realized_fieldsets():
-            with self.cpool.open() as conn:
+        with self.cpool.open() as conn:
+            for scm, tbl in self.toplevel_realized_fieldsets():
                 conn.yasdl_create_table_triggers(self, scm, tbl, sqlprocessor, options)
 
     def create_views(self, sqlprocessor, options):
@@ -456,8 +518,8 @@ class YASDLInstance:
 
     def create_comments(self, sqlprocessor, options):
         """Create comments on all tables and their fields."""
-        for scm, tbl in self.toplevel_realized_fieldsets():
-            with self.cpool.open() as conn:
+        with self.cpool.open() as conn:
+            for scm, tbl in self.toplevel_realized_fieldsets():
                 conn.yasdl_create_table_comments(
                     self, scm, tbl, sqlprocessor, options)
 
@@ -490,14 +552,14 @@ class YASDLInstance:
         options["ignore_exceptions"] = options.get("ignore_exceptions", False)
 
         self.create_before_all(sqlprocessor, options)
-        self.create_schemas(sqlprocessor, options)
-        self.create_tables(sqlprocessor, options)
+        self._batched(sqlprocessor, options, lambda: self.create_schemas(sqlprocessor, options))
+        self._batched(sqlprocessor, options, lambda: self.create_tables(sqlprocessor, options))
         self.create_data_raw(sqlprocessor, options)
-        self.create_constraints(sqlprocessor, options)
-        self.create_indexes(sqlprocessor, options)
-        self.create_triggers(sqlprocessor, options)
+        self._batched(sqlprocessor, options, lambda: self.create_constraints(sqlprocessor, options))
+        self._batched(sqlprocessor, options, lambda: self.create_indexes(sqlprocessor, options))
+        self._batched(sqlprocessor, options, lambda: self.create_triggers(sqlprocessor, options))
         self.create_views(sqlprocessor, options)
-        self.create_comments(sqlprocessor, options)
+        self._batched(sqlprocessor, options, lambda: self.create_comments(sqlprocessor, options))
         self.create_data(sqlprocessor, options)
         self.create_after_all(sqlprocessor, options)
 
@@ -527,25 +589,25 @@ class YASDLInstance:
 
     def drop_triggers(self, sqlprocessor, options):
         """Drop all triggers for all tables."""
-        for scm, tbl in self.toplevel_realized_fieldsets():
-            with self.cpool.open() as conn:
+        with self.cpool.open() as conn:
+            for scm, tbl in self.toplevel_realized_fieldsets():
                 conn.yasdl_drop_table_triggers(
                     self, scm, tbl, sqlprocessor, options)
 
     def drop_constraints(self, sqlprocessor, options):
         """Drop all constraints for all tables."""
-        for scm, tbl in self.toplevel_realized_fieldsets():
-            if not IGNORE_VENUS or scm.getpath() != "venus.core":
-                with self.cpool.open() as conn:
+        with self.cpool.open() as conn:
+            for scm, tbl in self.toplevel_realized_fieldsets():
+                if not IGNORE_VENUS or scm.getpath() != "venus.core":
                     conn.yasdl_drop_table_constraints(
                         self, scm, tbl, sqlprocessor, options)
                     conn.yasdl_drop_all_field_constraints(self, tbl, sqlprocessor, options)
 
     def drop_indexes(self, sqlprocessor, options):
         """Drop all indexes for all tables."""
-        for scm, tbl in self.toplevel_realized_fieldsets():
-            if not IGNORE_VENUS or scm.getpath() != "venus.core":
-                with self.cpool.open() as conn:
+        with self.cpool.open() as conn:
+            for scm, tbl in self.toplevel_realized_fieldsets():
+                if not IGNORE_VENUS or scm.getpath() != "venus.core":
                     conn.yasdl_drop_table_indexes(
                         self, scm, tbl, sqlprocessor, options)
 
@@ -557,16 +619,16 @@ class YASDLInstance:
 
     def drop_tables(self, sqlprocessor, options):
         """Drop all tables."""
-        for scm, tbl in self.toplevel_realized_fieldsets():
-            if not IGNORE_VENUS or scm.getpath() != "venus.core":
-                with self.cpool.open() as conn:
+        with self.cpool.open() as conn:
+            for scm, tbl in self.toplevel_realized_fieldsets():
+                if not IGNORE_VENUS or scm.getpath() != "venus.core":
                     conn.yasdl_drop_table(
                         self, scm, tbl, sqlprocessor, options)
 
     def drop_schemas(self, sqlprocessor, options):
         """Drop all schemas."""
-        for schema in self.parsed.iterate([ast.YASDLSchema]):
-            with self.cpool.open() as conn:
+        with self.cpool.open() as conn:
+            for schema in self.parsed.iterate([ast.YASDLSchema]):
                 conn.yasdl_drop_schema(
                     self, schema, sqlprocessor, options)
 
@@ -599,43 +661,40 @@ class YASDLInstance:
         options["ignore_exceptions"] = options.get("ignore_exceptions", False)
 
         if options["force"]:
-            self.drop_schemas(sqlprocessor, options)
+            self._batched(sqlprocessor, options, lambda: self.drop_schemas(sqlprocessor, options))
         else:
             self.drop_before_all(sqlprocessor, options)
             self.drop_data(sqlprocessor, options)
             self.drop_comments(sqlprocessor, options)
             self.drop_views(sqlprocessor, options)
-            self.drop_triggers(sqlprocessor, options)
-            self.drop_constraints(sqlprocessor, options)
-            self.drop_indexes(sqlprocessor, options)
+            self._batched(sqlprocessor, options, lambda: self.drop_triggers(sqlprocessor, options))
+            self._batched(sqlprocessor, options, lambda: self.drop_constraints(sqlprocessor, options))
+            self._batched(sqlprocessor, options, lambda: self.drop_indexes(sqlprocessor, options))
             self.drop_data_raw(sqlprocessor, options)
-            self.drop_tables(sqlprocessor, options)
-            self.drop_schemas(sqlprocessor, options)
+            self._batched(sqlprocessor, options, lambda: self.drop_tables(sqlprocessor, options))
+            self._batched(sqlprocessor, options, lambda: self.drop_schemas(sqlprocessor, options))
             self.drop_after_all(sqlprocessor, options)
 
     @classmethod
     def diff_schemas(cls, old_instance: "YASDLInstance", new_instance: "YASDLInstance") -> YASDLSchemaDiffResult:
         """Calculate the schemas that need to dropped and created."""
-        new_schemas = {scm.get_guid(): scm for scm in new_instance.schemas_with_toplevel_realized_fieldsets()}
-        old_schemas = {scm.get_guid(): scm for scm in old_instance.schemas_with_toplevel_realized_fieldsets()}
+        new_schemas = new_instance._schemas_by_guid
+        old_schemas = old_instance._schemas_by_guid
 
-        scm_to_create = set(new_schemas.keys()) - set(old_schemas.keys())
-        scm_to_drop = set(old_schemas.keys()) - set(new_schemas.keys())
+        scm_to_create = new_schemas.keys() - old_schemas.keys()
+        scm_to_drop = old_schemas.keys() - new_schemas.keys()
 
         return YASDLSchemaDiffResult(old_instance, new_instance, old_schemas, new_schemas, scm_to_drop, scm_to_create)
 
     @classmethod
     def diff_tables(cls, old_instance: "YASDLInstance", new_instance: "YASDLInstance") -> YASDLTableDiffResult:
         """Calculate tables that need to be dropped, upgraded and created."""
-        new_tables = {tbl.get_guid(): tbl for scm, tbl in new_instance.toplevel_realized_fieldsets()}
-        old_tables = {tbl.get_guid(): tbl for scm, tbl in old_instance.toplevel_realized_fieldsets()}
-
-        new_guids = set(new_tables.keys())
-        old_guids = set(old_tables.keys())
+        new_tables = new_instance._tables_by_guid
+        old_tables = old_instance._tables_by_guid
 
-        to_create = new_guids - old_guids
-        to_drop = old_guids - new_guids
-        common = old_guids & new_guids
+        to_create = new_tables.keys() - old_tables.keys()
+        to_drop = old_tables.keys() - new_tables.keys()
+        common = old_tables.keys() & new_tables.keys()
 
         common_tables = {guid: YASDLUpgradeTablePair(old_tables[guid], new_tables[guid]) for guid in common}
 
@@ -659,40 +718,28 @@ class YASDLInstance:
                 # Field paths in the new table, keyed by physical name
                 new_fields_by_pname = {}
                 field_pname_order = []
-                for fieldpath in new_table.itercontained([ast.YASDLField]):
-                    field = fieldpath[-1]
-                    if field.realized:
-                        pname = table_diff.new_instance.get_field_pname(new_table, fieldpath)
-                        new_fields_by_pname[pname] = fieldpath
-                        field_pname_order.append(pname)
+                for fieldpath, pname in table_diff.new_instance.get_realized_fields(new_table):
+                    new_fields_by_pname[pname] = fieldpath
+                    field_pname_order.append(pname)
 
                 # Field paths in the old table, keyed by physical name
                 old_fields_by_pname = {}
-                for fieldpath in old_table.itercontained([ast.YASDLField]):
-                    field = fieldpath[-1]
-                    if field.realized:
-                        pname = table_diff.old_instance.get_field_pname(old_table, fieldpath)
-                        old_fields_by_pname[pname] = fieldpath
-                        if pname not in field_pname_order:
-                            field_pname_order.append(pname)
-
-                # All physical field names in old and new tables
-                old_field_pnames = set(old_fields_by_pname.keys())
-                new_field_pnames = set(new_fields_by_pname.keys())
-
-                # Fields to be created, dropped and upgraded
-                to_drop = old_field_pnames - new_field_pnames
-                to_create = new_field_pnames - old_field_pnames
-                to_upgrade = new_field_pnames & old_field_pnames
-
-                # Calculate field paths in the good order.
+                for fieldpath, pname in table_diff.old_instance.get_realized_fields(old_table):
+                    if pname not in new_fields_by_pname and pname not in old_fields_by_pname:
+                        field_pname_order.append(pname)
+                    old_fields_by_pname[pname] = fieldpath
+
+                # Sort fields to be created, dropped and upgraded, in the good order.
                 to_drop_paths = []
                 to_create_paths = []
+                to_upgrade = []
                 for pname in field_pname_order:
-                    if pname in to_drop:
+                    if pname not in new_fields_by_pname:
                         to_drop_paths.append(old_fields_by_pname[pname])
-                    if pname in to_create:
+                    elif pname not in old_fields_by_pname:
                         to_create_paths.append(new_fields_by_pname[pname])
+                    else:
+                        to_upgrade.append(pname)
 
                 # TODO: the to_rename remains empty until we can identify fields with guids.
                 # Right not, it is not implemented, and they are identified by their physical names.
@@ -704,40 +751,39 @@ class YASDLInstance:
                 to_change_ondelete = []
 
                 # Process fields to be upgraded
-                for pname in to_upgrade:
-                    old_upg_fieldpath = old_fields_by_pname[pname]
-                    new_upg_fieldpath = new_fields_by_pname[pname]
-                    path_pair = YASDLFieldPathPair(old_upg_fieldpath, new_upg_fieldpath)
-                    old_field = old_upg_fieldpath[-1]
-                    new_field = new_upg_fieldpath[-1]
+                if to_upgrade:
                     with table_diff.old_instance.cpool.open() as oldconn:
                         with table_diff.new_instance.cpool.open() as newconn:
-                            old_typespec = oldconn.get_typespec(old_field)
-                            new_typespec = newconn.get_typespec(new_field)
-                            if old_typespec != new_typespec:
-                                to_retype.append(path_pair)
-                            old_notnull = old_field.get_notnull()
-                            new_notnull = new_field.get_notnull()
-                            if old_notnull and not new_notnull:
-                                to_drop_notnull.append(old_upg_fieldpath)
-                            if not old_notnull and new_notnull:
-                                to_create_notnull.append(new_upg_fieldpath)
-                            old_ondelete = old_field.get_ondelete()
-                            new_ondelete = new_field.get_ondelete()
-                            if old_ondelete != new_ondelete:
-                                to_change_ondelete.append(new_upg_fieldpath)
+                            for pname in to_upgrade:
+                                old_upg_fieldpath = old_fields_by_pname[pname]
+                                new_upg_fieldpath = new_fields_by_pname[pname]
+                                path_pair = YASDLFieldPathPair(old_upg_fieldpath, new_upg_fieldpath)
+                                old_field = old_upg_fieldpath[-1]
+                                new_field = new_upg_fieldpath[-1]
+                                old_typespec = oldconn.get_typespec(old_field)
+                                new_typespec = newconn.get_typespec(new_field)
+                                if old_typespec != new_typespec:
+                                    to_retype.append(path_pair)
+                                old_notnull = old_field.get_notnull()
+                                new_notnull = new_field.get_notnull()
+                                if old_notnull and not new_notnull:
+                                    to_drop_notnull.append(old_upg_fieldpath)
+                                if not old_notnull and new_notnull:
+                                    to_create_notnull.append(new_upg_fieldpath)
+                                old_ondelete = old_field.get_ondelete()
+                                new_ondelete = new_field.get_ondelete()
+                                if old_ondelete != new_ondelete:
+                                    to_change_ondelete.append(new_upg_fieldpath)
 
                 # Process fields to be added
-                for pname in to_create:
-                    new_upg_fieldpath = new_fields_by_pname[pname]
+                for new_upg_fieldpath in to_create_paths:
                     new_field = new_upg_fieldpath[-1]
                     new_notnull = new_field.get_notnull()
                     if new_notnull:
                         to_create_notnull.append(new_upg_fieldpath)
 
                 # Process fields to be dropped
-                for pname in to_drop:
-                    old_upg_fieldpath = old_fields_by_pname[pname]
+                for old_upg_fieldpath in to_drop_paths:
                     old_field = old_upg_fieldpath[-1]
                     old_notnull = old_field.get_notnull()
                     if old_notnull:
@@ -760,8 +806,9 @@ class YASDLInstance:
         schema_diff = cls.diff_schemas(old_instance, new_instance)
         table_diff = cls.diff_tables(old_instance, new_instance)
         field_diffs = cls.diff_fields(table_diff)
-        return YASDLUpgradeContext(old_instance, new_instance, schema_diff, table_diff, field_diffs, sqlprocessor,
-                                   options)
+        changed_field_diffs = [field_diff for field_diff in field_diffs if field_diff.has_change]
+        return YASDLUpgradeContext(old_instance, new_instance, schema_diff, table_diff, field_diffs,
+                                   sqlprocessor, options, changed_field_diffs)
 
     @classmethod
     def upgrade(cls, old_instance: "YASDLInstance", new_instance: "YASDLInstance", sqlprocessor, options=None):
@@ -795,45 +842,48 @@ class YASDLInstance:
         # 01 create_toplevel
         #
         cls.upgrade_before_all(upgrade_context)
-        cls.upgrade_create_schemas(upgrade_context)  # Create new schemas
-        cls.upgrade_create_tables(upgrade_context)  # Create new tables
+        cls._batched(sqlprocessor, options, lambda: cls.upgrade_create_schemas(upgrade_context))  # Create new schemas
+        cls._batched(sqlprocessor, options, lambda: cls.upgrade_create_tables(upgrade_context))  # Create new tables
         cls.upgrade_data_raw(upgrade_context)  # For new tables, without triggers
 
         #
         # 02 drop_inner
         #
-        cls.upgrade_drop_field_constraints(upgrade_context)
-        cls.upgrade_drop_table_constraints(upgrade_context)  # Drop table level constraints
+        cls._batched(sqlprocessor, options, lambda: cls.upgrade_drop_field_constraints(upgrade_context))
+        # Drop table level constraints
+        cls._batched(sqlprocessor, options, lambda: cls.upgrade_drop_table_constraints(upgrade_context))
         # TODO: what about tables that only had indexes changed???
-        cls.upgrade_drop_indexes(upgrade_context)  # For tables with fields changed or to be dropped
-        cls.upgrade_drop_triggers(upgrade_context)
+        # For tables with fields changed or to be dropped
+        cls._batched(sqlprocessor, options, lambda: cls.upgrade_drop_indexes(upgrade_context))
+        cls._batched(sqlprocessor, options, lambda: cls.upgrade_drop_triggers(upgrade_context))
         cls.upgrade_drop_views(upgrade_context)
 
         #
         # 30 upgrade_inner
         #
-        cls.upgrade_create_fields(upgrade_context)  # Create new fields
-        cls.upgrade_change_field_types(upgrade_context)  # Change field types
-        cls.upgrade_drop_fields(upgrade_context)  # Drop old fields
+        cls._batched(sqlprocessor, options, lambda: cls.upgrade_create_fields(upgrade_context))  # Create new fields
+        # Change field types
+        cls._batched(sqlprocessor, options, lambda: cls.upgrade_change_field_types(upgrade_context))
+        cls._batched(sqlprocessor, options, lambda: cls.upgrade_drop_fields(upgrade_context))  # Drop old fields
 
         #
         # 40 create_inner
         #
-        cls.upgrade_create_table_constraints(upgrade_context)
-        cls.upgrade_create_field_constraints(upgrade_context)
+        cls._batched(sqlprocessor, options, lambda: cls.upgrade_create_table_constraints(upgrade_context))
+        cls._batched(sqlprocessor, options, lambda: cls.upgrade_create_field_constraints(upgrade_context))
         # TODO: what about tables that only had indexes changed???
-        cls.upgrade_create_indexes(upgrade_context)
-        cls.upgrade_create_triggers(upgrade_context)
+        cls._batched(sqlprocessor, options, lambda: cls.upgrade_create_indexes(upgrade_context))
+        cls._batched(sqlprocessor, options, lambda: cls.upgrade_create_triggers(upgrade_context))
         cls.upgrade_create_views(upgrade_context)
-        cls.upgrade_create_comments(upgrade_context)
+        cls._batched(sqlprocessor, options, lambda: cls.upgrade_create_comments(upgrade_context))
         # TODO: what about index changes?
         cls.upgrade_data(upgrade_context)  # For new tables, with triggers
 
         #
         # 50 drop_toplevel
         #
-        cls.upgrade_drop_tables(upgrade_context)  # Drop unwanted tables
-        cls.upgrade_drop_schemas(upgrade_context)  # Drop unused schemas
+        cls._batched(sqlprocessor, options, lambda: cls.upgrade_drop_tables(upgrade_context))  # Drop unwanted tables
+        cls._batched(sqlprocessor, options, lambda: cls.upgrade_drop_schemas(upgrade_context))  # Drop unused schemas
 
     @classmethod
     def upgrade_before_all(self, upgrade_context: YASDLUpgradeContext):
@@ -900,15 +950,14 @@ class YASDLInstance:
         """Drop unwanted field level (not null) constraints."""
         instance = upgrade_context.old_instance
 
-        for field_diff in upgrade_context.field_diffs:
-            with instance.cpool.open() as conn:
+        with instance.cpool.open() as conn:
+            for field_diff in upgrade_context.changed_field_diffs:
                 for fieldpath in field_diff.to_drop_notnull:
                     conn.yasdl_field_drop_not_null(instance, field_diff.old_table, fieldpath,
                                                    upgrade_context.sqlprocessor, upgrade_context.options)
 
-        for guid in upgrade_context.table_diff.to_drop:
-            old_table = upgrade_context.table_diff.old_tables[guid]
-            with instance.cpool.open() as conn:
+            for guid in upgrade_context.table_diff.to_drop:
+                old_table = upgrade_context.table_diff.old_tables[guid]
                 conn.yasdl_drop_all_field_constraints(instance, old_table,
                                                       upgrade_context.sqlprocessor, upgrade_context.options)
 
@@ -916,62 +965,57 @@ class YASDLInstance:
     def upgrade_drop_table_constraints(cls, upgrade_context: YASDLUpgradeContext):
         """Drop table level constraints for all tables that have any field level changes."""
         instance = upgrade_context.old_instance
-        for field_diff in upgrade_context.field_diffs:
-            if field_diff.has_change:
+        with instance.cpool.open() as conn:
+            for field_diff in upgrade_context.changed_field_diffs:
                 table = field_diff.old_table
                 schema = table.owner_schema
                 if not IGNORE_VENUS or schema.getpath() != "venus.core":
-                    with instance.cpool.open() as conn:
-                        conn.yasdl_drop_table_constraints(
-                            instance, schema, table,
-                            upgrade_context.sqlprocessor, upgrade_context.options)
+                    conn.yasdl_drop_table_constraints(
+                        instance, schema, table,
+                        upgrade_context.sqlprocessor, upgrade_context.options)
 
-        for guid in upgrade_context.table_diff.to_drop:
-            old_table = upgrade_context.table_diff.old_tables[guid]
-            with instance.cpool.open() as conn:
+            for guid in upgrade_context.table_diff.to_drop:
+                old_table = upgrade_context.table_diff.old_tables[guid]
                 conn.yasdl_drop_table_constraints(instance, old_table.owner_schema, old_table,
                                                   upgrade_context.sqlprocessor, upgrade_context.options)
 
     @classmethod
     def upgrade_drop_indexes(cls, upgrade_context: YASDLUpgradeContext):
         """Drop indexes for all tables that have any field level changes."""
-        for field_diff in upgrade_context.field_diffs:
-            if field_diff.has_change:
+        old_instance = upgrade_context.old_instance
+        with old_instance.cpool.open() as conn:
+            for field_diff in upgrade_context.changed_field_diffs:
                 table = field_diff.old_table
                 schema = table.owner_schema
                 if not IGNORE_VENUS or schema.getpath() != "venus.core":
-                    with field_diff.old_instance.cpool.open() as conn:
-                        conn.yasdl_drop_table_indexes(
-                            field_diff.old_instance, schema, table,
-                            upgrade_context.sqlprocessor, upgrade_context.options)
+                    conn.yasdl_drop_table_indexes(
+                        field_diff.old_instance, schema, table,
+                        upgrade_context.sqlprocessor, upgrade_context.options)
 
     @classmethod
     def upgrade_drop_triggers(cls, upgrade_context: YASDLUpgradeContext):
         """Drop triggers for all tables that had any fields changed PLUS for all tables that will be dropped."""
         dropped = set([])
-
-        # Tables with any field level changes
-        for field_diff in upgrade_context.field_diffs:
-            if field_diff.has_change:
-                table = field_diff.old_table
-                schema = table.owner_schema
-                if not IGNORE_VENUS or schema.getpath() != "venus.core":
-                    dropped.add(table)
-                    with field_diff.old_instance.cpool.open() as conn:
-                        conn.yasdl_drop_table_triggers(
-                            field_diff.old_instance, schema, table,
-                            upgrade_context.sqlprocessor, upgrade_context.options)
-
-        # Tables that will be dropped
         table_diff = upgrade_context.table_diff
         old_instance = upgrade_context.old_instance
-        for guid in table_diff.to_drop:
-            table = table_diff.old_tables[guid]
-            if table not in dropped:
+        with old_instance.cpool.open() as conn:
+            # Tables with any field level changes
+            for field_diff in upgrade_context.changed_field_diffs:
+                table = field_diff.old_table
                 schema = table.owner_schema
                 if not IGNORE_VENUS or schema.getpath() != "venus.core":
                     dropped.add(table)
-                    with old_instance.cpool.open() as conn:
+                    conn.yasdl_drop_table_triggers(
+                        field_diff.old_instance, schema, table,
+                        upgrade_context.sqlprocessor, upgrade_context.options)
+
+            # Tables that will be dropped
+            for guid in table_diff.to_drop:
+                table = table_diff.old_tables[guid]
+                if table not in dropped:
+                    schema = table.owner_schema
+                    if not IGNORE_VENUS or schema.getpath() != "venus.core":
+                        dropped.add(table)
                         conn.yasdl_drop_table_triggers(
                             old_instance, schema, table,
                             upgrade_context.sqlprocessor, upgrade_context.options)
@@ -984,36 +1028,36 @@ class YASDLInstance:
     @classmethod
     def upgrade_create_fields(cls, upgrade_context: YASDLUpgradeContext):
         """Create new fields in existing tables."""
-        for field_diff in upgrade_context.field_diffs:
-            for field_path in field_diff.to_create:
-                table = field_diff.new_table
-                schema = table.owner_schema
-                if not IGNORE_VENUS or schema.getpath() != "venus.core":
-                    with field_diff.new_instance.cpool.open() as conn:
+        with upgrade_context.new_instance.cpool.open() as conn:
+            for field_diff in upgrade_context.changed_field_diffs:
+                for field_path in field_diff.to_create:
+                    table = field_diff.new_table
+                    schema = table.owner_schema
+                    if not IGNORE_VENUS or schema.getpath() != "venus.core":
                         conn.yasdl_add_field(field_diff.new_instance, table, field_path,
                                              upgrade_context.sqlprocessor, upgrade_context.options)
 
     @classmethod
     def upgrade_change_field_types(cls, upgrade_context: YASDLUpgradeContext):
         """Change field types in existing tables."""
-        for field_diff in upgrade_context.field_diffs:
-            for old_field_path, new_field_path in field_diff.to_retype:
-                new_table = field_diff.new_table
-                new_schema = new_table.owner_schema
-                if not IGNORE_VENUS or new_schema.getpath() != "venus.core":
-                    with field_diff.new_instance.cpool.open() as conn:
+        with upgrade_context.new_instance.cpool.open() as conn:
+            for field_diff in upgrade_context.changed_field_diffs:
+                for old_field_path, new_field_path in field_diff.to_retype:
+                    new_table = field_diff.new_table
+                    new_schema = new_table.owner_schema
+                    if not IGNORE_VENUS or new_schema.getpath() != "venus.core":
                         conn.yasdl_field_change_type(field_diff.new_instance, new_table, new_field_path,
                                                      upgrade_context.sqlprocessor, upgrade_context.options)
 
     @classmethod
     def upgrade_drop_fields(cls, upgrade_context: YASDLUpgradeContext):
         """Change field types in existing tables."""
-        for field_diff in upgrade_context.field_diffs:
-            for field_path in field_diff.to_drop:
-                table = field_diff.old_table
-                schema = table.owner_schema
-                if not IGNORE_VENUS or schema.getpath() != "venus.core":
-                    with field_diff.old_instance.cpool.open() as conn:
+        with upgrade_context.old_instance.cpool.open() as conn:
+            for field_diff in upgrade_context.changed_field_diffs:
+                for field_path in field_diff.to_drop:
+                    table = field_diff.old_table
+                    schema = table.owner_schema
+                    if not IGNORE_VENUS or schema.getpath() != "venus.core":
                         conn.yasdl_drop_field(field_diff.old_instance, table, field_path,
                                               upgrade_context.sqlprocessor, upgrade_context.options)
 
@@ -1021,19 +1065,17 @@ class YASDLInstance:
     def upgrade_create_table_constraints(cls, upgrade_context: YASDLUpgradeContext):
         """Create table level constraints for all tables that have any field level changes."""
         instance = upgrade_context.new_instance
-        for field_diff in upgrade_context.field_diffs:
-            if field_diff.has_change:
+        with instance.cpool.open() as conn:
+            for field_diff in upgrade_context.changed_field_diffs:
                 table = field_diff.new_table
                 schema = table.owner_schema
                 if not IGNORE_VENUS or schema.getpath() != "venus.core":
-                    with instance.cpool.open() as conn:
-                        conn.yasdl_create_table_constraints(
-                            instance, schema, table,
-                            upgrade_context.sqlprocessor, upgrade_context.options)
+                    conn.yasdl_create_table_constraints(
+                        instance, schema, table,
+                        upgrade_context.sqlprocessor, upgrade_context.options)
 
-        for guid in upgrade_context.table_diff.to_create:
-            new_table = upgrade_context.table_diff.new_tables[guid]
-            with instance.cpool.open() as conn:
+            for guid in upgrade_context.table_diff.to_create:
+                new_table = upgrade_context.table_diff.new_tables[guid]
                 conn.yasdl_create_table_constraints(instance, new_table.owner_schema, new_table,
                                                     upgrade_context.sqlprocessor, upgrade_context.options)
 
@@ -1042,15 +1084,14 @@ class YASDLInstance:
         """Create new field level (not null) constraints."""
         instance = upgrade_context.new_instance
 
-        for field_diff in upgrade_context.field_diffs:
-            with instance.cpool.open() as conn:
+        with instance.cpool.open() as conn:
+            for field_diff in upgrade_context.changed_field_diffs:
                 for fieldpath in field_diff.to_create_notnull:
                     conn.yasdl_field_set_not_null(instance, field_diff.new_table, fieldpath,
                                                   upgrade_context.sqlprocessor, upgrade_context.options)
 
-        for guid in upgrade_context.table_diff.to_create:
-            new_table = upgrade_context.table_diff.new_tables[guid]
-            with instance.cpool.open() as conn:
+            for guid in upgrade_context.table_diff.to_create:
+                new_table = upgrade_context.table_diff.new_tables[guid]
                 conn.yasdl_create_all_field_constraints(instance, new_table,
                                                         upgrade_context.sqlprocessor, upgrade_context.options)
 
@@ -1058,27 +1099,25 @@ class YASDLInstance:
     def upgrade_create_indexes(cls, upgrade_context: YASDLUpgradeContext):
         """Create indexes for all tables that have any field level changes."""
         created = set([])
-        for field_diff in upgrade_context.field_diffs:
-            if field_diff.has_change:
-                table = field_diff.new_table
-                schema = table.owner_schema
-                if not IGNORE_VENUS or schema.getpath() != "venus.core":
-                    created.add(table)
-                    with field_diff.new_instance.cpool.open() as conn:
-                        conn.yasdl_create_table_indexes(
-                            field_diff.new_instance, schema, table,
-                            upgrade_context.sqlprocessor, upgrade_context.options)
-
-        # Tables that will were created
         table_diff = upgrade_context.table_diff
         new_instance = upgrade_context.new_instance
-        for guid in table_diff.to_create:
-            table = table_diff.new_tables[guid]
-            if table not in created:
+        with new_instance.cpool.open() as conn:
+            for field_diff in upgrade_context.changed_field_diffs:
+                table = field_diff.new_table
                 schema = table.owner_schema
                 if not IGNORE_VENUS or schema.getpath() != "venus.core":
                     created.add(table)
-                    with new_instance.cpool.open() as conn:
+                    conn.yasdl_create_table_indexes(
+                        field_diff.new_instance, schema, table,
+                        upgrade_context.sqlprocessor, upgrade_context.options)
+
+            # Tables that will were created
+            for guid in table_diff.to_create:
+                table = table_diff.new_tables[guid]
+                if table not in created:
+                    schema = table.owner_schema
+                    if not IGNORE_VENUS or schema.getpath() != "venus.core":
+                        created.add(table)
                         conn.yasdl_create_table_indexes(new_instance, schema, table,
                                                         upgrade_context.sqlprocessor, upgrade_context.options)
 
@@ -1086,29 +1125,26 @@ class YASDLInstance:
     def upgrade_create_triggers(cls, upgrade_context: YASDLUpgradeContext):
         """Create triggers for all tables that had any fields changed PLUS for all tables that will be dropped."""
         created = set([])
-
-        # Tables with any field level changes
-        for field_diff in upgrade_context.field_diffs:
-            if field_diff.has_change:
-                table = field_diff.new_table
-                schema = table.owner_schema
-                if not IGNORE_VENUS or schema.getpath() != "venus.core":
-                    created.add(table)
-                    with field_diff.new_instance.cpool.open() as conn:
-                        conn.yasdl_create_table_triggers(
-                            field_diff.new_instance, schema, table,
-                            upgrade_context.sqlprocessor, upgrade_context.options)
-
-        # Tables that will were created
         table_diff = upgrade_context.table_diff
         new_instance = upgrade_context.new_instance
-        for guid in table_diff.to_create:
-            table = table_diff.new_tables[guid]
-            if table not in created:
+        with new_instance.cpool.open() as conn:
+            # Tables with any field level changes
+            for field_diff in upgrade_context.changed_field_diffs:
+                table = field_diff.new_table
                 schema = table.owner_schema
                 if not IGNORE_VENUS or schema.getpath() != "venus.core":
                     created.add(table)
-                    with new_instance.cpool.open() as conn:
+                    conn.yasdl_create_table_triggers(
+                        field_diff.new_instance, schema, table,
+                        upgrade_context.sqlprocessor, upgrade_context.options)
+
+            # Tables that will were created
+            for guid in table_diff.to_create:
+                table = table_diff.new_tables[guid]
+                if table not in created:
+                    schema = table.owner_schema
+                    if not IGNORE_VENUS or schema.getpath() != "venus.core":
+                        created.add(table)
                         conn.yasdl_create_table_triggers(new_instance, schema, table,
                                                          upgrade_context.sqlprocessor, upgrade_context.options)
 
@@ -1151,14 +1187,11 @@ class YASDLInstance:
                         raise AttributeError(_("Table %s.%s does not exist." % (sname, tname)))
                     else:
                         print("    TABLE %s" % tname)
-                    for fieldpath in tbl.itercontained([ast.YASDLField]):
-                        field = fieldpath[-1]
-                        if field.realized:
-                            fname = self.get_field_pname(tbl, fieldpath)
-                            if not conn.column_exists(sname, tname, fname):
-                                raise AttributeError(_("Field %s.%s.%s does not exist." % (sname, tname, fname)))
-                            else:
-                                print("        FIELD %s" % fname)
+                    for fieldpath, fname in self.get_realized_fields(tbl):
+                        if not conn.column_exists(sname, tname, fname):
+                            raise AttributeError(_("Field %s.%s.%s does not exist." % (sname, tname, fname)))
+                        else:
+                            print("        FIELD %s" % fname)
 
                     for index in tbl.members:
                         if isinstance(index, ast.YASDLIndex):
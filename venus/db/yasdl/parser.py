@@ -288,7 +288,7 @@ class YASDLParseResult:
                         raise YASDLSchemaLocationError('"%s": %s' % (schema.getsourcefile(), str(e)))
                     use_stack = [src] + schema.use_stack
                     use.src = src
-                    if not src in list(self.schemas.keys()):
+                    if src not in self.schemas:
                         for item in use_stack:
                             self.debug("parse_needed:%s" % item)
                         parse_needed.append(use_stack)
@@ -393,8 +393,7 @@ class YASDLParseResult:
         It is the chain of iterate(min_classes) for all parsed schemas.
         """
         for schema in list(self.schemas.values()):
-            for item in schema.iterate(min_classes):
-                yield item
+            yield from schema.iterate(min_classes)
 
     @classmethod
     def bind(cls, obj, name, recursive=True, excludes=None):
@@ -526,7 +525,8 @@ class YASDLParseResult:
     @classmethod
     def _gzip_bytes(cls, data):
         out = io.BytesIO()
-        with gzip.GzipFile(fileobj=out, mode='w') as fo:
+        # mtime=0 keeps the current time out of the gzip header
+        with gzip.GzipFile(fileobj=out, mode='w', mtime=0) as fo:
             fo.write(data)
         return out.getvalue()
 
@@ -546,4 +546,7 @@ class YASDLParseResult:
     def loads(cls, data) -> "YASDLParseResult":
         result = pickle.loads(cls._gunzip_bytes(data))
         assert isinstance(result, cls)
+        # Owner caches are not pickled, rebuild them.
+        for schema in result.schemas.values():
+            schema.setup_owners()
         return result